@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Streaming rollups of exported analytics events.
+
+Reads JSON Lines exports of AnalyticsEvent records (lib/analytics.ts), as
+stored under analytics/ in blob storage, one event at a time and folds them
+into fixed-size summaries, so memory does not grow with the export:
+
+- the summary /api/analytics/data computes (events by type, top pages,
+  shop/enroll clicks, module completions, downloads, events per session);
+- funnels: sessions reaching each step of FUNNELS;
+- per-module starts, completions and completion rate (distinct users);
+- daily active users and sessions;
+- session length and events per session as histograms.
+
+Distinct users and sessions are counted with HyperLogLog sketches (about
+1.6% standard error), top pages with a bounded Space-Saving counter, and
+session lengths from the sessions open at any moment (a session closes after
+SESSION_IDLE_MS without events or at the end of its file).
+
+Each export file is rolled up in its own worker process and the partial
+results are merged. --save writes the merged rollup so later runs can merge
+it with new exports instead of re-reading old ones.
+
+Usage:
+    python3 analytics_rollup.py exports/*.jsonl [--workers N] [--json report.json]
+    python3 analytics_rollup.py new.jsonl previous.rollup.json --save all.rollup.json
+"""
+
+import argparse
+import base64
+import bisect
+import gzip
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Funnel name -> event types in step order; a session reaches a step if it
+# has that event at all
+FUNNELS = {
+    'conversion': ('page_view', 'pricing_view', 'enroll_button_click', 'shop_click'),
+    'learning': ('module_start', 'quiz_start', 'quiz_submit', 'module_complete'),
+    'login': ('login_attempt', 'login_success'),
+}
+
+# HyperLogLog precision: 2**12 one-byte registers per sketch
+HLL_PRECISION = 12
+
+# Pages tracked by the top-pages counter
+TOP_PAGES_CAPACITY = 200
+
+# A session with no events for this long is considered over
+SESSION_IDLE_MS = 30 * 60 * 1000
+
+# Open sessions kept for duration tracking; the least recent are closed first
+MAX_OPEN_SESSIONS = 50000
+
+# Upper bounds of the histogram buckets (seconds, events)
+DURATION_BUCKETS = (0, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, math.inf)
+EVENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, math.inf)
+
+ROLLUP_VERSION = 1
+
+
+class HyperLogLog:
+    """Approximate distinct counter with mergeable fixed-size registers"""
+
+    __slots__ = ('registers',)
+
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers else bytearray(1 << HLL_PRECISION)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = x >> (64 - HLL_PRECISION)
+        rest = x & ((1 << (64 - HLL_PRECISION)) - 1)
+        rank = (64 - HLL_PRECISION) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        m = len(self.registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_json(self):
+        return base64.b64encode(bytes(self.registers)).decode('ascii')
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(base64.b64decode(data))
+
+
+class TopCounter:
+    """Space-Saving heavy hitters: at most `capacity` keys, counts may overestimate"""
+
+    __slots__ = ('capacity', 'counts')
+
+    def __init__(self, capacity=TOP_PAGES_CAPACITY, counts=None):
+        self.capacity = capacity
+        self.counts = dict(counts or {})
+
+    def add(self, key, amount=1):
+        if key in self.counts or len(self.counts) < self.capacity:
+            self.counts[key] = self.counts.get(key, 0) + amount
+            return
+        smallest = min(self.counts, key=self.counts.get)
+        self.counts[key] = self.counts.pop(smallest) + amount
+
+    def merge(self, other):
+        for key, amount in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + amount
+        if len(self.counts) > self.capacity:
+            self.counts = dict(sorted(self.counts.items(), key=lambda item: -item[1])[:self.capacity])
+
+    def top(self, n):
+        return dict(sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:n])
+
+
+def _histogram_add(histogram, bounds, value):
+    histogram[bisect.bisect_left(bounds, value)] += 1
+
+
+def _histogram_quantile(histogram, bounds, q):
+    """Upper bound of the bucket holding the q-quantile ('>N' for the open last bucket)"""
+    total = sum(histogram)
+    if not total:
+        return None
+    running = 0
+    for count, bound in zip(histogram, bounds):
+        running += count
+        if running >= q * total:
+            break
+    return f'>{bounds[-2]}' if math.isinf(bound) else bound
+
+
+def _day(timestamp):
+    return time.strftime('%Y-%m-%d', time.gmtime(timestamp / 1000))
+
+
+class Rollup:
+    """Mergeable, bounded-size summary of a stream of AnalyticsEvent records"""
+
+    def __init__(self):
+        self.events = 0
+        self.invalid = 0
+        self.first = None
+        self.last = None
+        self.by_type = {}
+        self.pages = TopCounter()
+        self.users = HyperLogLog()
+        self.sessions = HyperLogLog()
+        self.funnels = {name: [HyperLogLog() for _ in steps] for name, steps in FUNNELS.items()}
+        # module id -> {'starts': n, 'completions': n, 'quizSubmits': n,
+        #               'startUsers': HLL, 'completeUsers': HLL}
+        self.modules = {}
+        # day -> (users HLL, sessions HLL, events)
+        self.days = {}
+        self.durations = [0] * len(DURATION_BUCKETS)
+        self.session_events = [0] * len(EVENT_BUCKETS)
+        self._open = {}
+
+    def add(self, event):
+        """Fold one event into the rollup"""
+        event_type = event.get('eventType')
+        timestamp = event.get('timestamp')
+        if not isinstance(event_type, str) or not isinstance(timestamp, (int, float)):
+            self.invalid += 1
+            return
+
+        self.events += 1
+        self.first = timestamp if self.first is None else min(self.first, timestamp)
+        self.last = timestamp if self.last is None else max(self.last, timestamp)
+        self.by_type[event_type] = self.by_type.get(event_type, 0) + 1
+
+        user = event.get('userId')
+        session = event.get('sessionId') or ''
+        data = event.get('eventData') or {}
+        actor = f'user:{user}' if user else f'session:{session}'
+
+        if user:
+            self.users.add(str(user))
+        self.sessions.add(session)
+
+        day = self.days.get(_day(timestamp))
+        if day is None:
+            day = self.days[_day(timestamp)] = [HyperLogLog(), HyperLogLog(), 0]
+        if user:
+            day[0].add(str(user))
+        day[1].add(session)
+        day[2] += 1
+
+        if event_type == 'page_view':
+            self.pages.add(event.get('path') or data.get('path') or '')
+
+        for name, steps in FUNNELS.items():
+            if event_type in steps:
+                self.funnels[name][steps.index(event_type)].add(session)
+
+        if event_type in ('module_start', 'module_complete', 'quiz_submit') and data.get('moduleId') is not None:
+            module = self.modules.get(str(data['moduleId']))
+            if module is None:
+                module = self.modules[str(data['moduleId'])] = {
+                    'starts': 0, 'completions': 0, 'quizSubmits': 0,
+                    'startUsers': HyperLogLog(), 'completeUsers': HyperLogLog(),
+                }
+            if event_type == 'module_start':
+                module['starts'] += 1
+                module['startUsers'].add(actor)
+            elif event_type == 'module_complete':
+                module['completions'] += 1
+                module['completeUsers'].add(actor)
+            else:
+                module['quizSubmits'] += 1
+
+        self._track_session(session, timestamp)
+
+    def _track_session(self, session, timestamp):
+        state = self._open.pop(session, None)
+        if state is not None and timestamp - state[1] > SESSION_IDLE_MS:
+            self._close(state)
+            state = None
+        if state is None:
+            state = [timestamp, timestamp, 0]
+        state[0] = min(state[0], timestamp)
+        state[1] = max(state[1], timestamp)
+        state[2] += 1
+        # Re-inserting keeps the dict ordered from least to most recently active
+        self._open[session] = state
+
+        if len(self._open) > MAX_OPEN_SESSIONS:
+            self._close(self._open.pop(next(iter(self._open))))
+
+    def _close(self, state):
+        _histogram_add(self.durations, DURATION_BUCKETS, (state[1] - state[0]) / 1000)
+        _histogram_add(self.session_events, EVENT_BUCKETS, state[2])
+
+    def finish(self):
+        """Close every open session (end of an export file)"""
+        for state in self._open.values():
+            self._close(state)
+        self._open = {}
+        return self
+
+    def merge(self, other):
+        """Fold another (finished) rollup into this one"""
+        self.events += other.events
+        self.invalid += other.invalid
+        for attr, pick in (('first', min), ('last', max)):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, pick(values) if values else None)
+        for event_type, count in other.by_type.items():
+            self.by_type[event_type] = self.by_type.get(event_type, 0) + count
+        self.pages.merge(other.pages)
+        self.users.merge(other.users)
+        self.sessions.merge(other.sessions)
+        for name, steps in other.funnels.items():
+            for mine, theirs in zip(self.funnels.setdefault(name, [HyperLogLog() for _ in steps]), steps):
+                mine.merge(theirs)
+        for module_id, theirs in other.modules.items():
+            mine = self.modules.setdefault(module_id, {
+                'starts': 0, 'completions': 0, 'quizSubmits': 0,
+                'startUsers': HyperLogLog(), 'completeUsers': HyperLogLog(),
+            })
+            for key in ('starts', 'completions', 'quizSubmits'):
+                mine[key] += theirs[key]
+            mine['startUsers'].merge(theirs['startUsers'])
+            mine['completeUsers'].merge(theirs['completeUsers'])
+        for day, (users, sessions, events) in other.days.items():
+            mine = self.days.setdefault(day, [HyperLogLog(), HyperLogLog(), 0])
+            mine[0].merge(users)
+            mine[1].merge(sessions)
+            mine[2] += events
+        self.durations = [a + b for a, b in zip(self.durations, other.durations)]
+        self.session_events = [a + b for a, b in zip(self.session_events, other.session_events)]
+        return self
+
+    def report(self):
+        """Plain-dict results; counts of distinct users/sessions are estimates"""
+        sessions = self.sessions.count()
+        funnels = {}
+        for name, steps in FUNNELS.items():
+            reached = [sketch.count() for sketch in self.funnels[name]]
+            funnels[name] = [
+                {'step': step, 'sessions': count, 'conversion': round(count / reached[0], 4) if reached[0] else None}
+                for step, count in zip(steps, reached)
+            ]
+        modules = {}
+        for module_id in sorted(self.modules, key=lambda key: (not key.isdigit(), int(key) if key.isdigit() else key)):
+            module = self.modules[module_id]
+            starters = module['startUsers'].count()
+            completers = module['completeUsers'].count()
+            modules[module_id] = {
+                'starts': module['starts'],
+                'completions': module['completions'],
+                'quizSubmits': module['quizSubmits'],
+                'usersStarted': starters,
+                'usersCompleted': completers,
+                'completionRate': round(min(completers / starters, 1.0), 4) if starters else None,
+            }
+        return {
+            'totalEvents': self.events,
+            'invalidLines': self.invalid,
+            'from': self.first,
+            'to': self.last,
+            'uniqueUsers': self.users.count(),
+            'uniqueSessions': sessions,
+            'eventsByType': dict(sorted(self.by_type.items(), key=lambda item: -item[1])),
+            'topPages': self.pages.top(10),
+            'shopClicks': self.by_type.get('shop_click', 0),
+            'enrollButtonClicks': self.by_type.get('enroll_button_click', 0),
+            'moduleCompletions': self.by_type.get('module_complete', 0),
+            'downloads': self.by_type.get('toolkit_download', 0),
+            'avgEventsPerSession': round(self.events / sessions, 2) if sessions else 0,
+            'funnels': funnels,
+            'modules': modules,
+            'daily': {
+                day: {'activeUsers': users.count(), 'sessions': day_sessions.count(), 'events': events}
+                for day, (users, day_sessions, events) in sorted(self.days.items())
+            },
+            'sessionSeconds': {
+                'median': _histogram_quantile(self.durations, DURATION_BUCKETS, 0.5),
+                'p90': _histogram_quantile(self.durations, DURATION_BUCKETS, 0.9),
+                'histogram': dict(zip(map(str, DURATION_BUCKETS), self.durations)),
+            },
+            'eventsPerSession': {
+                'median': _histogram_quantile(self.session_events, EVENT_BUCKETS, 0.5),
+                'p90': _histogram_quantile(self.session_events, EVENT_BUCKETS, 0.9),
+                'histogram': dict(zip(map(str, EVENT_BUCKETS), self.session_events)),
+            },
+        }
+
+    def to_json(self):
+        """Serialisable partial state for --save"""
+        return {
+            'version': ROLLUP_VERSION,
+            'events': self.events,
+            'invalid': self.invalid,
+            'first': self.first,
+            'last': self.last,
+            'byType': self.by_type,
+            'pages': self.pages.counts,
+            'users': self.users.to_json(),
+            'sessions': self.sessions.to_json(),
+            'funnels': {name: [sketch.to_json() for sketch in steps] for name, steps in self.funnels.items()},
+            'modules': {
+                module_id: {
+                    **{key: module[key] for key in ('starts', 'completions', 'quizSubmits')},
+                    'startUsers': module['startUsers'].to_json(),
+                    'completeUsers': module['completeUsers'].to_json(),
+                }
+                for module_id, module in self.modules.items()
+            },
+            'days': {day: [u.to_json(), s.to_json(), n] for day, (u, s, n) in self.days.items()},
+            'durations': self.durations,
+            'sessionEvents': self.session_events,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get('version') != ROLLUP_VERSION:
+            raise ValueError(f"rollup version {data.get('version')} is not {ROLLUP_VERSION}")
+        rollup = cls()
+        rollup.events = data['events']
+        rollup.invalid = data['invalid']
+        rollup.first = data['first']
+        rollup.last = data['last']
+        rollup.by_type = dict(data['byType'])
+        rollup.pages = TopCounter(counts=data['pages'])
+        rollup.users = HyperLogLog.from_json(data['users'])
+        rollup.sessions = HyperLogLog.from_json(data['sessions'])
+        for name, steps in data['funnels'].items():
+            if name in rollup.funnels:
+                rollup.funnels[name] = [HyperLogLog.from_json(sketch) for sketch in steps]
+        for module_id, module in data['modules'].items():
+            rollup.modules[module_id] = {
+                **{key: module[key] for key in ('starts', 'completions', 'quizSubmits')},
+                'startUsers': HyperLogLog.from_json(module['startUsers']),
+                'completeUsers': HyperLogLog.from_json(module['completeUsers']),
+            }
+        rollup.days = {
+            day: [HyperLogLog.from_json(u), HyperLogLog.from_json(s), n] for day, (u, s, n) in data['days'].items()
+        }
+        rollup.durations = list(data['durations'])
+        rollup.session_events = list(data['sessionEvents'])
+        return rollup
+
+
+def _open_export(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def rollup_file(path):
+    """Roll up one input: a JSONL export (optionally .gz) or a saved rollup"""
+    if path.endswith('.rollup.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return Rollup.from_json(json.load(f))
+
+    rollup = Rollup()
+    with _open_export(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                rollup.invalid += 1
+                continue
+            if isinstance(event, dict):
+                rollup.add(event)
+            else:
+                rollup.invalid += 1
+    return rollup.finish()
+
+
+def rollup_files(paths, workers=None):
+    """Merged rollup of all inputs, one worker process per file"""
+    merged = Rollup()
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    if workers == 1:
+        for path in paths:
+            merged.merge(rollup_file(path))
+        return merged
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(rollup_file, paths):
+            merged.merge(partial)
+    return merged
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Roll up exported analytics events with bounded memory.')
+    parser.add_argument('inputs', nargs='+', help='JSONL exports (.jsonl/.jsonl.gz) or saved .rollup.json files')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--json', help='write the report as JSON to this path')
+    parser.add_argument('--save', help='write the merged rollup (must end in .rollup.json) for later merges')
+    args = parser.parse_args(argv)
+    if args.save and not args.save.endswith('.rollup.json'):
+        parser.error('--save path must end in .rollup.json')
+
+    started = time.perf_counter()
+    rollup = rollup_files(args.inputs, args.workers)
+    report = rollup.report()
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    if args.save:
+        tmp_path = f'{args.save}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(rollup.to_json(), f, separators=(',', ':'))
+        os.replace(tmp_path, args.save)
+
+    print(f"{report['totalEvents']:,} events ({report['invalidLines']} invalid) from {len(args.inputs)} input(s) "
+          f"in {elapsed:.2f}s")
+    print(f"  ~{report['uniqueUsers']:,} users, ~{report['uniqueSessions']:,} sessions, "
+          f"{report['avgEventsPerSession']} events/session")
+    for name, steps in report['funnels'].items():
+        print(f"  {name} funnel: " + ' → '.join(f"{s['step']} {s['sessions']:,}" for s in steps))
+    for module_id, module in report['modules'].items():
+        rate = f"{module['completionRate']:.0%}" if module['completionRate'] is not None else '-'
+        print(f"  module {module_id}: {module['starts']} starts, {module['completions']} completions ({rate} of users)")
+    if report['daily']:
+        active = [day['activeUsers'] for day in report['daily'].values()]
+        print(f"  {len(active)} days, daily active users avg {sum(active) / len(active):.1f}, max {max(active)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
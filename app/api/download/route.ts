@@ -1,85 +1,190 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { readFile, access } from 'fs/promises'
+import { readFile, access, stat } from 'fs/promises'
 import { join } from 'path'
 import { cookies } from 'next/headers'
 import { verifySessionToken } from '@/lib/jwt-session'
+import {
+  assetHeaders,
+  getAsset,
+  notModified,
+  readAssetRange,
+  resolveRange,
+  type AssetEntry,
+} from '@/lib/asset-manifest'
 
-export async function GET(request: NextRequest) {
-  try {
-    const searchParams = request.nextUrl.searchParams
-    const fileName = searchParams.get('file')
+// Security: Only allow specific files from Clinical Toolkit
+const allowedFiles = [
+  'SCAT6_Fillable.pdf',
+  'SCOAT6_Fillable.pdf',
+  'Concussion Clinical Cheat Sheet.pdf',
+  'Concussion Myth-Buster Sheet .pdf',
+  'Post-Concussion Syndrome (PCS) Clinical Flowchart.pdf',
+  'Referral Flowchart.pdf',
+  'Return-to-Play (RTP) & Return-to-Learn (RTL) Progression Ladder.pdf',
+  'Return-to-School Plan Template (DOCX).docx',
+  'Employer _ School Letter Template.docx',
+  'Email Template Pack.docx',
+  '"What to Expect After a Concussion" .pdf',
+  'RehabFlow.png',
+]
 
-    if (!fileName) {
-      return NextResponse.json({ error: 'File name required' }, { status: 400 })
-    }
+// Validate the requested file and the caller's access; returns the file name
+// or the error response to send
+async function authorizeDownload(request: NextRequest): Promise<string | NextResponse> {
+  const searchParams = request.nextUrl.searchParams
+  const fileName = searchParams.get('file')
 
-    // Security: Only allow specific files from Clinical Toolkit
-    const allowedFiles = [
-      'SCAT6_Fillable.pdf',
-      'SCOAT6_Fillable.pdf',
-      'Concussion Clinical Cheat Sheet.pdf',
-      'Concussion Myth-Buster Sheet .pdf',
-      'Post-Concussion Syndrome (PCS) Clinical Flowchart.pdf',
-      'Referral Flowchart.pdf',
-      'Return-to-Play (RTP) & Return-to-Learn (RTL) Progression Ladder.pdf',
-      'Return-to-School Plan Template (DOCX).docx',
-      'Employer _ School Letter Template.docx',
-      'Email Template Pack.docx',
-      '"What to Expect After a Concussion" .pdf',
-      'RehabFlow.png',
-    ]
-
-    if (!allowedFiles.includes(fileName)) {
-      return NextResponse.json({ error: 'File not found' }, { status: 404 })
-    }
+  if (!fileName) {
+    return NextResponse.json({ error: 'File name required' }, { status: 400 })
+  }
 
-    // Authentication check - ALL files now require authentication
-    // Check session JWT token
-    const cookieStore = await cookies()
-    const sessionToken = cookieStore.get('session')?.value
+  if (!allowedFiles.includes(fileName)) {
+    return NextResponse.json({ error: 'File not found' }, { status: 404 })
+  }
 
-    if (!sessionToken) {
-      return NextResponse.json(
-        { error: 'Authentication required. Please log in to download resources.' },
-        { status: 401 }
-      )
-    }
+  // Authentication check - ALL files now require authentication
+  // Check session JWT token
+  const cookieStore = await cookies()
+  const sessionToken = cookieStore.get('session')?.value
 
-    // Verify JWT session token
-    const sessionData = verifySessionToken(sessionToken)
-    if (!sessionData) {
-      return NextResponse.json(
-        { error: 'Invalid or expired session. Please log in again.' },
-        { status: 401 }
-      )
-    }
+  if (!sessionToken) {
+    return NextResponse.json(
+      { error: 'Authentication required. Please log in to download resources.' },
+      { status: 401 }
+    )
+  }
 
-    // Verify user has paid access (online-only or full-course)
-    if (!sessionData.accessLevel || (sessionData.accessLevel !== 'online-only' && sessionData.accessLevel !== 'full-course')) {
-      return NextResponse.json(
-        { error: 'Premium access required to download resources.' },
-        { status: 403 }
-      )
+  // Verify JWT session token
+  const sessionData = verifySessionToken(sessionToken)
+  if (!sessionData) {
+    return NextResponse.json(
+      { error: 'Invalid or expired session. Please log in again.' },
+      { status: 401 }
+    )
+  }
+
+  // Verify user has paid access (online-only or full-course)
+  if (!sessionData.accessLevel || (sessionData.accessLevel !== 'online-only' && sessionData.accessLevel !== 'full-course')) {
+    return NextResponse.json(
+      { error: 'Premium access required to download resources.' },
+      { status: 403 }
+    )
+  }
+
+  return fileName
+}
+
+/**
+ * Serve an asset described by the download manifest (build_asset_manifest.py).
+ *
+ * HEAD, 304 and 416 responses are answered from the manifest alone; range
+ * requests read only the requested bytes, which lets PDF viewers fetch a
+ * linearized document's first page before the rest.
+ */
+async function serveFromManifest(
+  request: NextRequest,
+  entry: AssetEntry,
+  fileName: string,
+  head: boolean
+): Promise<NextResponse> {
+  const headers = assetHeaders(entry, fileName)
+
+  if (notModified(entry, request.headers.get('if-none-match'), request.headers.get('if-modified-since'))) {
+    return new NextResponse(null, { status: 304, headers })
+  }
+
+  const range = resolveRange(entry, request.headers.get('range'), request.headers.get('if-range'))
+  if (range === 'unsatisfiable') {
+    return new NextResponse(null, {
+      status: 416,
+      headers: { ...headers, 'Content-Range': `bytes */${entry.size}` },
+    })
+  }
+
+  if (range) {
+    const length = range.end - range.start + 1
+    const rangeHeaders = {
+      ...headers,
+      'Content-Range': `bytes ${range.start}-${range.end}/${entry.size}`,
+      'Content-Length': String(length),
     }
+    if (head) return new NextResponse(null, { status: 206, headers: rangeHeaders })
+    const body = await readAssetRange(entry, range)
+    return new NextResponse(body, { status: 206, headers: rangeHeaders })
+  }
+
+  if (head) return new NextResponse(null, { headers: { ...headers, 'Content-Length': String(entry.size) } })
+  const body = await readFile(join(process.cwd(), entry.path))
+  return new NextResponse(body, { headers: { ...headers, 'Content-Length': String(body.length) } })
+}
 
-    // Try multiple possible file paths
-    const possiblePaths = [
-      join(process.cwd(), 'public', 'docs', fileName),
-      join(process.cwd(), 'docs', fileName),
-      join(process.cwd(), '..', 'docs', fileName),
-    ]
-
-    let filePath: string | null = null
-    for (const path of possiblePaths) {
-      try {
-        await access(path)
-        filePath = path
-        break
-      } catch {
-        continue
-      }
+// Path of a download when there is no manifest entry, or null when missing
+async function findFile(fileName: string): Promise<string | null> {
+  const possiblePaths = [
+    join(process.cwd(), 'public', 'docs', fileName),
+    join(process.cwd(), 'docs', fileName),
+    join(process.cwd(), '..', 'docs', fileName),
+  ]
+  for (const path of possiblePaths) {
+    try {
+      await access(path)
+      return path
+    } catch {
+      continue
     }
+  }
+  return null
+}
+
+// Response headers for a download served without a manifest entry
+function fallbackHeaders(fileName: string): Record<string, string> {
+  const contentType = fileName.endsWith('.pdf')
+    ? 'application/pdf'
+    : fileName.endsWith('.docx')
+    ? 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+    : fileName.endsWith('.png')
+    ? 'image/png'
+    : fileName.endsWith('.zip')
+    ? 'application/zip'
+    : 'application/octet-stream'
+  return {
+    'Content-Type': contentType,
+    'Content-Disposition': `attachment; filename="${fileName}"`,
+    'Cache-Control': 'private, max-age=3600',
+  }
+}
+
+export async function HEAD(request: NextRequest) {
+  try {
+    const authorized = await authorizeDownload(request)
+    if (typeof authorized !== 'string') return new NextResponse(null, { status: authorized.status })
+
+    const entry = await getAsset(authorized)
+    if (entry) return await serveFromManifest(request, entry, authorized, true)
+
+    // No manifest: the headers GET would send, from a stat of the file
+    const filePath = await findFile(authorized)
+    if (!filePath) return new NextResponse(null, { status: 404 })
+    const { size } = await stat(filePath)
+    return new NextResponse(null, {
+      headers: { ...fallbackHeaders(authorized), 'Content-Length': String(size) },
+    })
+  } catch (error) {
+    console.error('Download error:', error)
+    return new NextResponse(null, { status: 500 })
+  }
+}
+
+export async function GET(request: NextRequest) {
+  try {
+    const authorized = await authorizeDownload(request)
+    if (typeof authorized !== 'string') return authorized
+    const fileName = authorized
 
+    const entry = await getAsset(fileName)
+    if (entry) return await serveFromManifest(request, entry, fileName, false)
+
+    const filePath = await findFile(fileName)
     if (!filePath) {
       return NextResponse.json(
         { error: 'File not found on server. Please contact support.' },
@@ -88,26 +193,7 @@ export async function GET(request: NextRequest) {
     }
 
     const fileBuffer = await readFile(filePath)
-
-    // Determine content type
-    const contentType = fileName.endsWith('.pdf')
-      ? 'application/pdf'
-      : fileName.endsWith('.docx')
-      ? 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-      : fileName.endsWith('.png')
-      ? 'image/png'
-      : fileName.endsWith('.zip')
-      ? 'application/zip'
-      : 'application/octet-stream'
-
-    // Return file with appropriate headers
-    return new NextResponse(fileBuffer, {
-      headers: {
-        'Content-Type': contentType,
-        'Content-Disposition': `attachment; filename="${fileName}"`,
-        'Cache-Control': 'private, max-age=3600',
-      },
-    })
+    return new NextResponse(fileBuffer, { headers: fallbackHeaders(fileName) })
 
   } catch (error) {
     console.error('Download error:', error)
@@ -1,7 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { verifySessionToken } from '@/lib/jwt-session'
-import { getModuleById } from '@/data/modules'
 import { getSCATModuleById } from '@/data/scat-modules'
+import { etagMatches, loadModuleChunk, loadModulePayload } from '@/lib/module-chunks'
 
 /**
  * Secure Module Content API
@@ -12,6 +12,11 @@ import { getSCATModuleById } from '@/data/scat-modules'
  * - Authenticated (paid): Full module content
  *
  * This prevents content from being exposed to unauthorized users.
+ *
+ * Paid modules are read one at a time from the converter's per-module chunks
+ * when MODULE_CHUNKS_DIR is set; otherwise data/modules is loaded on demand.
+ * With chunks, the response body is pre-rendered (and pre-compressed) at
+ * build time and carries a strong ETag, so repeat requests get a 304.
  */
 export async function GET(
   request: NextRequest,
@@ -54,11 +59,38 @@ export async function GET(
       sessionData.accessLevel === 'online-only' ||
       sessionData.accessLevel === 'full-course'
 
+    if (hasFullAccess) {
+      const payload = await loadModulePayload(
+        moduleId,
+        'full',
+        sessionData.accessLevel,
+        request.headers.get('accept-encoding')
+      )
+      if (payload) {
+        const headers: Record<string, string> = {
+          ETag: payload.etag,
+          'Cache-Control': 'private, no-cache',
+          Vary: 'Accept-Encoding, Cookie',
+        }
+        if (etagMatches(request.headers.get('if-none-match'), payload.etags)) {
+          return new NextResponse(null, { status: 304, headers })
+        }
+        headers['Content-Type'] = 'application/json'
+        headers['Content-Length'] = String(payload.body.length)
+        if (payload.encoding) headers['Content-Encoding'] = payload.encoding
+        return new NextResponse(new Uint8Array(payload.body), { headers })
+      }
+    }
+
     // Get appropriate module based on access level
     let module
     if (hasFullAccess) {
       // Paid users: Get from main course modules
-      module = getModuleById(moduleId)
+      module = await loadModuleChunk(moduleId)
+      if (!module) {
+        const { getModuleById } = await import('@/data/modules')
+        module = getModuleById(moduleId)
+      }
       if (!module) {
         return NextResponse.json(
           { error: 'Module not found' },
@@ -1,13 +1,16 @@
 import { NextRequest, NextResponse } from 'next/server'
-import { getAllModules } from '@/data/modules'
 import { getSCATModules } from '@/data/scat-modules'
 import { verifySessionToken } from '@/lib/jwt-session'
+import { loadModuleIndex } from '@/lib/module-chunks'
 
 /**
  * Module List API - Returns module metadata based on access level
  *
  * - Preview users: FREE SCAT6/SCOAT6 Mastery course modules (5 modules)
  * - Paid users: Full concussion management course (8 modules)
+ *
+ * Paid module metadata comes from the converter's index.json when
+ * MODULE_CHUNKS_DIR is set, so no module content is loaded to build the list.
  */
 export async function GET(request: NextRequest) {
   try {
@@ -36,7 +39,9 @@ export async function GET(request: NextRequest) {
       sessionData.accessLevel === 'online-only' ||
       sessionData.accessLevel === 'full-course'
 
-    const modules = hasFullAccess ? getAllModules() : getSCATModules()
+    const index = hasFullAccess ? await loadModuleIndex() : null
+    const modules = index
+      ?? (hasFullAccess ? (await import('@/data/modules')).getAllModules() : getSCATModules())
 
     // Return only metadata, strip out all content
     const moduleList = modules.map(module => ({
@@ -1,5 +1,17 @@
-import { PDFDocument } from 'pdf-lib'
+import {
+  PDFAcroCheckBox,
+  PDFAcroRadioButton,
+  PDFAcroText,
+  PDFCheckBox,
+  PDFDict,
+  PDFDocument,
+  PDFForm,
+  PDFRadioGroup,
+  PDFRef,
+  PDFTextField,
+} from 'pdf-lib'
 import { SCAT6FormData } from '../types/scat6.types'
+import SCAT6_FIELD_INDEX from './scat6-field-index.json'
 
 /**
  * SCAT6 PDF Export - CORRECTED Field Mapping
@@ -12,6 +24,10 @@ import { SCAT6FormData } from '../types/scat6.types'
  * - Text42, Text42A, Text45, Text84D, Text87 (different from usual description)
  *
  * These fields will remain empty in the exported PDF.
+ *
+ * Field lookups go through scat6-field-index.json (regenerate with
+ * `python3 generate_field_index.py`), which also validates every field name
+ * used here against the template.
  */
 export async function exportSCAT6ToFilledPDF(
   formData: SCAT6FormData,
@@ -31,7 +47,7 @@ export async function exportSCAT6ToFilledPDF(
       ignoreEncryption: true,
       throwOnInvalidObject: false
     })
-    const form = pdfDoc.getForm()
+    const form = createIndexedForm(pdfDoc, pdfDoc.getForm())
 
     let filledCount = 0
 
@@ -289,6 +305,77 @@ export async function exportSCAT6ToFilledPDF(
   }
 }
 
+// ==================== FIELD INDEX ====================
+
+interface IndexedField {
+  object: number
+  generation: number
+  type: string
+  flags: number
+}
+
+const RADIO_FLAG = 1 << 15
+const PUSH_BUTTON_FLAG = 1 << 16
+
+/**
+ * Wrap the form so lookups jump straight to the field objects recorded in
+ * scat6-field-index.json instead of pdf-lib scanning every field by name.
+ * Anything the index cannot answer (unknown name, different type, or a
+ * template whose objects no longer match) falls back to the PDFForm method.
+ */
+function createIndexedForm(pdfDoc: PDFDocument, form: PDFForm) {
+  const fields = SCAT6_FIELD_INDEX.fields as Record<string, IndexedField>
+
+  const lookup = (fieldName: string, matches: (entry: IndexedField) => boolean) => {
+    const entry = fields[fieldName]
+    if (!entry || !matches(entry)) return undefined
+    const ref = PDFRef.of(entry.object, entry.generation)
+    const dict = pdfDoc.context.lookupMaybe(ref, PDFDict)
+    return dict ? { ref, dict } : undefined
+  }
+
+  const isText = (entry: IndexedField) => entry.type === '/Tx'
+  const isRadio = (entry: IndexedField) => entry.type === '/Btn' && (entry.flags & RADIO_FLAG) !== 0
+  const isCheckBox = (entry: IndexedField) =>
+    entry.type === '/Btn' && (entry.flags & (RADIO_FLAG | PUSH_BUTTON_FLAG)) === 0
+
+  return {
+    getTextField(fieldName: string): PDFTextField {
+      const hit = lookup(fieldName, isText)
+      if (hit) {
+        const acroField = PDFAcroText.fromDict(hit.dict, hit.ref)
+        if (acroField.getFullyQualifiedName() === fieldName) {
+          return PDFTextField.of(acroField, hit.ref, pdfDoc)
+        }
+      }
+      return form.getTextField(fieldName)
+    },
+    getRadioGroup(fieldName: string): PDFRadioGroup {
+      const hit = lookup(fieldName, isRadio)
+      if (hit) {
+        const acroField = PDFAcroRadioButton.fromDict(hit.dict, hit.ref)
+        if (acroField.getFullyQualifiedName() === fieldName) {
+          return PDFRadioGroup.of(acroField, hit.ref, pdfDoc)
+        }
+      }
+      return form.getRadioGroup(fieldName)
+    },
+    getCheckBox(fieldName: string): PDFCheckBox {
+      const hit = lookup(fieldName, isCheckBox)
+      if (hit) {
+        const acroField = PDFAcroCheckBox.fromDict(hit.dict, hit.ref)
+        if (acroField.getFullyQualifiedName() === fieldName) {
+          return PDFCheckBox.of(acroField, hit.ref, pdfDoc)
+        }
+      }
+      return form.getCheckBox(fieldName)
+    },
+    getButton(fieldName: string) {
+      return form.getButton(fieldName)
+    },
+  }
+}
+
 // ==================== HELPER FUNCTIONS ====================
 
 function setTextField(form: any, fieldName: string, value: string | number): number {
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Vectorised SCAT6/SCOAT6 scoring for cohort analytics.
+
+Reproduces getAllCalculatedScores() from scat6-calculations.ts and
+scoat6-calculations.ts over a whole batch of exported assessments at once:
+records are unpacked once into NumPy columns (symptoms as an n x 22 matrix,
+memory trials as n x 3 x 10, and so on) and every score is a column
+operation on those arrays.
+
+Numeric scores are arrays; the TypeScript string results (gait times,
+dual-task accuracy) are floats with NaN where the form shows '' or '-', and
+record_scores() formats one row exactly as the browser would. Values that
+are missing from a record count as 0, like the form defaults.
+
+--parity replays a JSONL file of {"form", "record", "scores"} lines, where
+"scores" is what getAllCalculatedScores() returned for the record in the
+browser, and fails on any difference. data/scoring-parity.jsonl holds the
+reference cases, including non-ASCII digits, infinite and 1e21+ times.
+
+Usage:
+    python3 assessment_scoring.py assessments.jsonl [--form scat6|scoat6]
+        [--output scores.csv] [--group-by sportTeamSchool]
+    python3 assessment_scoring.py --parity data/scoring-parity.jsonl
+"""
+
+import argparse
+import csv
+import json
+import math
+import re
+import sys
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+from scat6_batch_fill import read_records
+
+parity_path = 'data/scoring-parity.jsonl'
+
+# Key order of SCAT6FormData['symptoms'] (scat6.types.ts)
+SCAT6_SYMPTOMS = (
+    'headaches', 'pressureInHead', 'neckPain', 'nauseaVomiting', 'dizziness',
+    'blurredVision', 'balanceProblems', 'sensitivityLight', 'sensitivityNoise',
+    'feelingSlowedDown', 'feelingInFog', 'dontFeelRight', 'difficultyConcentrating',
+    'difficultyRemembering', 'fatigueOrLowEnergy', 'confusion', 'drowsiness',
+    'moreEmotional', 'irritability', 'sadness', 'nervousAnxious', 'troubleFallingAsleep',
+)
+
+# Key order of SCOAT6FormData['symptoms'] (scoat6.types.ts); 'other' is rated too
+SCOAT6_SYMPTOMS = (
+    'headaches', 'pressureInHead', 'neckPain', 'nauseaVomiting', 'dizziness',
+    'blurredVision', 'balanceProblems', 'sensitivityLight', 'sensitivityNoise',
+    'feelingSlowedDown', 'feelingInFog', 'difficultyConcentrating',
+    'difficultyRemembering', 'fatigueOrLowEnergy', 'confusion', 'drowsiness',
+    'moreEmotional', 'irritability', 'sadness', 'nervousAnxious',
+    'sleepDisturbance', 'abnormalHeartRate', 'excessiveSweating', 'other',
+)
+
+# SCOAT6 symptom rating columns, and the score-name suffix of each
+SCOAT6_COLUMNS = (
+    ('preInjury', 'PreInjury'),
+    ('dayInjured', 'DayInjured'),
+    ('consult1', 'Consult1'),
+    ('consult2', 'Consult2'),
+    ('consult3', 'Consult3'),
+)
+
+ORIENTATION = ('orientationMonth', 'orientationDate', 'orientationDayOfWeek', 'orientationYear', 'orientationTime')
+MEMORY_TRIALS = ('immediateMemoryTrial1', 'immediateMemoryTrial2', 'immediateMemoryTrial3')
+MBESS = ('mBessDoubleErrors', 'mBessTandemErrors', 'mBessSingleErrors')
+MBESS_FOAM = ('mBessFoamDoubleErrors', 'mBessFoamTandemErrors', 'mBessFoamSingleErrors')
+TANDEM_GAIT = ('tandemGaitTrial1', 'tandemGaitTrial2', 'tandemGaitTrial3')
+DUAL_TASK = ('dualTask1Time', 'dualTask2Time', 'dualTask3Time')
+GAD7 = tuple(f'gad7_{n}' for n in range(1, 8))
+PHQ2 = ('phq2_1', 'phq2_2')
+SLEEP = tuple(f'sleep{n}' for n in range(1, 6))
+
+# Upper bounds (inclusive) of each severity band, as in getGAD7Severity/getSleepSeverity
+GAD7_BANDS = ((4, 9, 14), ('Minimal anxiety', 'Mild anxiety', 'Moderate anxiety', 'Severe anxiety'))
+SLEEP_BANDS = ((4, 7, 10), ('Normal', 'Mild', 'Moderate', 'Severe'))
+
+# Scores the TypeScript returns as toFixed(2) strings, and what it shows for "no value"
+FIXED_SCORES = {
+    'tandemGaitAverage': '',
+    'tandemGaitFastest': '',
+    'dualTaskFastest': '',
+    'dualTaskAccuracy': '-',
+}
+
+# The leading number JavaScript's parseFloat() accepts (ASCII digits only)
+FLOAT_PREFIX = re.compile(r'\s*([+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))', re.ASCII)
+
+
+def parse_float(value):
+    """JavaScript parseFloat(): the leading number of a string, else NaN"""
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = FLOAT_PREFIX.match(str(value))
+    return float(match.group(1).replace('Infinity', 'inf')) if match else math.nan
+
+
+def to_fixed(value, empty=''):
+    """
+    Number.prototype.toFixed(2), or `empty` for NaN (ties round up, like
+    JavaScript). Infinities and values of 1e21 or more print as JavaScript's
+    String() does: 'Infinity', '1e+25'.
+    """
+    if math.isnan(value):
+        return empty
+    if math.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    if abs(value) >= 1e21:
+        return repr(value)
+    if value == 0:
+        value = 0.0
+    return str(Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+
+def _number(value):
+    if value is None or isinstance(value, bool):
+        return float(bool(value)) if value is not None else 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def numbers(records, key, missing=0.0):
+    """Float column of a top-level numeric field; None/absent -> `missing`"""
+    return np.fromiter(
+        (missing if record.get(key) is None else _number(record.get(key)) for record in records),
+        dtype=float, count=len(records),
+    )
+
+
+def flags(records, keys):
+    """n x len(keys) boolean matrix of truthy fields"""
+    matrix = np.zeros((len(records), len(keys)), dtype=bool)
+    for row, record in enumerate(records):
+        matrix[row] = [bool(record.get(key)) for key in keys]
+    return matrix
+
+
+def parsed(records, keys):
+    """n x len(keys) matrix of parseFloat() of string fields"""
+    matrix = np.empty((len(records), len(keys)))
+    for row, record in enumerate(records):
+        matrix[row] = [parse_float(record.get(key)) for key in keys]
+    return matrix
+
+
+def checked_counts(records, key):
+    """Truthy entries of a boolean-list field: arr.filter(Boolean).length"""
+    width = max((len(record.get(key) or ()) for record in records), default=0)
+    matrix = np.zeros((len(records), width), dtype=bool)
+    for row, record in enumerate(records):
+        values = record.get(key) or ()
+        matrix[row, :len(values)] = [bool(value) for value in values]
+    return matrix.sum(axis=1)
+
+
+def scat6_symptom_matrix(records):
+    """n x 22 symptom ratings"""
+    matrix = np.zeros((len(records), len(SCAT6_SYMPTOMS)))
+    for row, record in enumerate(records):
+        symptoms = record.get('symptoms') or {}
+        matrix[row] = [_number(symptoms.get(key)) for key in SCAT6_SYMPTOMS]
+    return matrix
+
+
+def scoat6_symptom_matrix(records):
+    """n x 24 x 5 symptom ratings (symptom, date column)"""
+    matrix = np.zeros((len(records), len(SCOAT6_SYMPTOMS), len(SCOAT6_COLUMNS)))
+    for row, record in enumerate(records):
+        symptoms = record.get('symptoms') or {}
+        for index, key in enumerate(SCOAT6_SYMPTOMS):
+            ratings = symptoms.get(key)
+            if isinstance(ratings, dict) and 'preInjury' in ratings:
+                matrix[row, index] = [_number(ratings.get(column)) for column, _ in SCOAT6_COLUMNS]
+    return matrix
+
+
+def _concentration(records):
+    """digitsBackward + 1 for months in reverse in under 30 s without errors"""
+    months_time = np.nan_to_num(parsed(records, ('monthsReverseTime',))[:, 0], nan=0.0)
+    months_errors = numbers(records, 'monthsReverseErrors', missing=math.nan)
+    months_point = (months_time > 0) & (months_time < 30) & (months_errors == 0)
+    return numbers(records, 'digitsBackward') + months_point
+
+
+def _memory(records):
+    immediate = sum(checked_counts(records, key) for key in MEMORY_TRIALS)
+    return immediate, checked_counts(records, 'delayedRecall')
+
+
+def _foam_total(records):
+    """Sum of the foam stances; NaN when any stance was not done (null)"""
+    foam = np.stack([numbers(records, key, missing=math.nan) for key in MBESS_FOAM], axis=1)
+    return foam.sum(axis=1)
+
+
+def _valid_times(records, keys):
+    times = parsed(records, keys)
+    return np.where(times > 0, times, np.nan)
+
+
+def _mean_time(times):
+    count = np.sum(~np.isnan(times), axis=1)
+    total = np.nansum(times, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def _fastest_time(times):
+    filled = np.where(np.isnan(times), np.inf, times).min(axis=1)
+    return np.where(np.isinf(filled), np.nan, filled)
+
+
+def _severity(scores, bands):
+    bounds, labels = bands
+    return np.asarray(labels)[np.searchsorted(bounds, scores, side='left')]
+
+
+def _screen(records, keys, not_done):
+    total = sum(numbers(records, key) for key in keys)
+    return np.where(flags(records, (not_done,))[:, 0], 0.0, total)
+
+
+def score_scat6(records):
+    """Column arrays of every SCAT6 score, in getAllCalculatedScores() order"""
+    symptoms = scat6_symptom_matrix(records)
+    orientation = flags(records, ORIENTATION).sum(axis=1)
+    immediate, delayed = _memory(records)
+    concentration = _concentration(records)
+    tandem = _valid_times(records, TANDEM_GAIT)
+    return {
+        'symptomNumber': (symptoms > 0).sum(axis=1),
+        'symptomSeverity': symptoms.sum(axis=1),
+        'orientation': orientation,
+        'immediateMemory': immediate,
+        'concentration': concentration,
+        'delayedRecall': delayed,
+        'totalCognitive': orientation + immediate + concentration + delayed,
+        'mBessTotal': sum(numbers(records, key) for key in MBESS),
+        'mBessFoamTotal': _foam_total(records),
+        'tandemGaitAverage': _mean_time(tandem),
+        'tandemGaitFastest': _fastest_time(tandem),
+        'dualTaskFastest': _fastest_time(_valid_times(records, DUAL_TASK)),
+    }
+
+
+def score_scoat6(records):
+    """Column arrays of every SCOAT6 score, in getAllCalculatedScores() order"""
+    symptoms = scoat6_symptom_matrix(records)
+    scores = {}
+    for index, (_, suffix) in enumerate(SCOAT6_COLUMNS):
+        scores[f'symptomNumber{suffix}'] = (symptoms[:, :, index] > 0).sum(axis=1)
+    for index, (_, suffix) in enumerate(SCOAT6_COLUMNS):
+        scores[f'symptomSeverity{suffix}'] = symptoms[:, :, index].sum(axis=1)
+
+    immediate, delayed = _memory(records)
+    tandem = _valid_times(records, TANDEM_GAIT)
+    forward = numbers(records, 'complexTandemForwardEyesOpen') + numbers(records, 'complexTandemForwardEyesClosed')
+    backward = numbers(records, 'complexTandemBackwardEyesOpen') + numbers(records, 'complexTandemBackwardEyesClosed')
+    attempted = numbers(records, 'dualTaskTrialsAttempted')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        accuracy = np.where(attempted == 0, np.nan, numbers(records, 'dualTaskTrialsCorrect') / attempted)
+    gad7 = _screen(records, GAD7, 'gad7NotDone')
+    sleep = _screen(records, SLEEP, 'sleepNotDone')
+
+    scores.update({
+        'immediateMemory': immediate,
+        'concentration': _concentration(records),
+        'delayedRecall': delayed,
+        'mBessTotal': sum(numbers(records, key) for key in MBESS),
+        'mBessFoamTotal': _foam_total(records),
+        'tandemGaitAverage': _mean_time(tandem),
+        'tandemGaitFastest': _fastest_time(tandem),
+        'complexTandemForward': forward,
+        'complexTandemBackward': backward,
+        'complexTandemTotal': forward + backward,
+        'dualTaskAccuracy': accuracy,
+        'gad7Score': gad7,
+        'gad7Severity': _severity(gad7, GAD7_BANDS),
+        'phq2Score': _screen(records, PHQ2, 'phq2NotDone'),
+        'sleepScore': sleep,
+        'sleepSeverity': _severity(sleep, SLEEP_BANDS),
+    })
+    return scores
+
+
+SCORERS = {'scat6': score_scat6, 'scoat6': score_scoat6}
+
+
+def record_scores(scores, row):
+    """One record's scores shaped exactly like the TypeScript getAllCalculatedScores()"""
+    result = {}
+    for name, column in scores.items():
+        value = column[row]
+        if name in FIXED_SCORES:
+            result[name] = to_fixed(float(value), FIXED_SCORES[name])
+        elif isinstance(value, str) or column.dtype.kind in 'US':
+            result[name] = str(value)
+        elif math.isnan(value):
+            result[name] = None
+        else:
+            result[name] = int(value) if float(value).is_integer() else float(value)
+    return result
+
+
+def check_parity(path):
+    """Compare against browser-computed scores; returns a list of differences"""
+    cases = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if line.strip():
+                case = json.loads(line)
+                cases.setdefault(case['form'], []).append((number, case))
+
+    problems = []
+    for form, entries in cases.items():
+        scores = SCORERS[form]([case['record'] for _, case in entries])
+        for row, (number, case) in enumerate(entries):
+            actual = record_scores(scores, row)
+            for name, expected in case['scores'].items():
+                if actual.get(name) != expected:
+                    problems.append(f"line {number} ({form}): {name} expected {expected!r}, got {actual.get(name)!r}")
+    return problems, sum(len(entries) for entries in cases.values())
+
+
+def summarize(records, scores, group_by):
+    """Per-group count, median and mean of every numeric score"""
+    keys = np.asarray([str(record.get(group_by) or '(none)') for record in records])
+    numeric = {name: column for name, column in scores.items() if column.dtype.kind in 'fi'}
+    lines = []
+    for group in np.unique(keys):
+        mask = keys == group
+        lines.append(f"{group_by}={group} (n={int(mask.sum())})")
+        for name, column in numeric.items():
+            values = column[mask]
+            values = values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+            if values.size:
+                lines.append(f"  {name:28} median {np.median(values):8.2f}  mean {values.mean():8.2f}")
+    return lines
+
+
+def write_scores(path, records, scores):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['record', 'idNumber', *scores])
+        for row, record in enumerate(records):
+            formatted = record_scores(scores, row)
+            writer.writerow([row + 1, record.get('idNumber', ''), *('' if v is None else v for v in formatted.values())])
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Score exported SCAT6/SCOAT6 assessments in bulk.')
+    parser.add_argument('input', nargs='?', help='JSON Lines or CSV file of form data records')
+    parser.add_argument('--form', choices=sorted(SCORERS), default='scat6')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help='input format (default: by extension)')
+    parser.add_argument('--output', help='write per-record scores to this CSV')
+    parser.add_argument('--group-by', help='summarise scores per value of this record field, e.g. sportTeamSchool')
+    parser.add_argument('--parity', nargs='?', const=parity_path, metavar='PATH',
+                        help=f'check against browser-computed scores (default: {parity_path})')
+    args = parser.parse_args(argv)
+
+    if args.parity:
+        problems, checked = check_parity(args.parity)
+        for problem in problems:
+            print(f"  ✗ {problem}", file=sys.stderr)
+        if problems:
+            print(f"✗ {len(problems)} difference(s) in {checked} records", file=sys.stderr)
+            return 1
+        print(f"✓ {checked} records match the TypeScript scores")
+        return 0
+
+    if not args.input:
+        parser.error('an input file is required unless --parity is given')
+    records = list(read_records(args.input, args.format))
+    scores = SCORERS[args.form](records)
+    print(f"Scored {len(records)} {args.form.upper()} assessments")
+    if args.output:
+        write_scores(args.output, records, scores)
+        print(f"✓ {args.output}")
+    if args.group_by:
+        for line in summarize(records, scores, args.group_by):
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the course converter and the PDF form tooling.
+
+Generates synthetic inputs -- course manuals at 1x, 10x and 100x the size
+of PARSED_COURSE_CONTENT.md (modules, sections, tables, quizzes and
+references) and AcroForm PDFs with hundreds to thousands of fields laid out
+like SCAT6_Fillable.pdf (text fields, /1-/Off checkboxes and 0-6 radio
+scales) -- then times each pipeline stage and records its tracemalloc peak.
+
+Every run is appended to .benchmarks/history.jsonl and compared with the
+previous run made with the same --repeat, --scales and --fields, so
+regressions show up as a percentage next to each stage.
+
+Usage:
+    python3 benchmark_tooling.py                      # everything
+    python3 benchmark_tooling.py --only course --scales 1,10
+    python3 benchmark_tooling.py --only pdf --fields 300,1000 --repeat 5
+    python3 benchmark_tooling.py --quick --no-save
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import convert_modules
+from pdf_field_catalog import build_catalog
+from pdf_field_resolver import FieldResolver
+from pdf_form_writer import TemplateForm
+
+source_path = 'PARSED_COURSE_CONTENT.md'
+results_dir = '.benchmarks'
+inputs_dir = os.path.join(results_dir, 'inputs')
+
+# Stages slower than this (relative to the previous run) are flagged
+REGRESSION_THRESHOLD = 0.20
+
+# Benchmark sizes and repeats for a full run and for --quick; explicit
+# --scales, --fields and --repeat take precedence over either
+FULL_DEFAULTS = {'scales': [1, 10, 100], 'fields': [300, 1000, 3000], 'repeat': 3}
+QUICK_DEFAULTS = {'scales': [1, 10], 'fields': [300], 'repeat': 1}
+
+WORDS = (
+    'concussion assessment vestibular oculomotor cervical symptom recovery protocol clinical '
+    'balance memory orientation headache dizziness graded exercise return cognitive screening '
+    'neurometabolic cascade biomarker imaging pathway referral rehabilitation athlete sideline '
+    'tolerance threshold monitoring management evaluation criteria domain phenotype'
+).split()
+
+FIELDS_PER_PAGE = 40
+
+
+# ==================== SYNTHETIC INPUTS ====================
+
+def _sentence(rng, low=6, high=16):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return ' '.join(words).capitalize()
+
+
+def _synthetic_module(rng, number):
+    """Markdown lines for one module, shaped like the real manual's modules"""
+    lines = [f'## MODULE {number}: {" ".join(rng.choices(WORDS, k=5)).upper()}',
+             f'**Subtitle:** {_sentence(rng, 4, 8)}', '',
+             '### Learning Objectives']
+    lines += [f'- {_sentence(rng)}' for _ in range(4)]
+    lines.append('')
+
+    for s in range(rng.randint(8, 14)):
+        lines += [f'### {_sentence(rng, 2, 5)} {s + 1}', '']
+        for sub in range(rng.randint(1, 4)):
+            lines += [f'#### {sub + 1}. {_sentence(rng, 2, 5)}']
+            lines += [f'- **{rng.choice(WORDS).title()}:** {_sentence(rng)}' for _ in range(rng.randint(2, 6))]
+            lines.append('')
+        if rng.random() < 0.5:
+            columns = rng.randint(2, 4)
+            lines.append('| ' + ' | '.join(rng.choice(WORDS).title() for _ in range(columns)) + ' |')
+            lines.append('|' + '|'.join('------' for _ in range(columns)) + '|')
+            for _ in range(rng.randint(3, 10)):
+                lines.append('| ' + ' | '.join(_sentence(rng, 2, 6) for _ in range(columns)) + ' |')
+            lines.append('')
+
+    lines += [f'### Module {number} Quiz: {_sentence(rng, 2, 4)}', '']
+    for q in range(rng.randint(4, 8)):
+        answer = rng.randrange(4)
+        lines.append(f'**{q + 1}. {_sentence(rng, 5, 10)}?**')
+        for i, letter in enumerate('abcd'):
+            option = _sentence(rng, 2, 6)
+            lines.append(f'- {letter}) **{option}**' if i == answer else f'- {letter}) {option}')
+        lines.append('')
+
+    lines += [f'### Module {number} References']
+    for _ in range(rng.randint(4, 8)):
+        author = rng.choice(WORDS).title()
+        lines.append(f'- {author}, A. B., et al. ({rng.randint(1995, 2024)}). {_sentence(rng)}. '
+                     f'*{_sentence(rng, 2, 4)}*, {rng.randint(1, 60)}({rng.randint(1, 12)}), {rng.randint(1, 900)}-{rng.randint(901, 999)}.')
+    lines += ['', '---', '']
+    return lines
+
+
+def synthetic_manual(scale, seed=6):
+    """A synthetic course manual with about `scale` times the real manual's lines"""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        target = sum(1 for _ in f) * scale
+
+    rng = random.Random(seed)
+    lines = ['# SYNTHETIC COURSE CONTENT', '## Benchmark Manual', '', '---', '']
+    number = 0
+    while len(lines) < target:
+        number += 1
+        lines += _synthetic_module(rng, number)
+    lines += ['## APPENDIX', '', '### Glossary of Terms', f'- {_sentence(rng)}', '', '---', '',
+              '*End of Parsed Course Content Document*']
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_form_pdf(path, field_count, seed=6):
+    """
+    Write an AcroForm PDF with `field_count` fields in the SCAT6 layout:
+    roughly 60% text fields, 20% /1-/Off checkboxes and 20% radio scales
+    whose seven kid widgets carry the /0-/6 states.
+    """
+    from PyPDF2 import PdfWriter
+    from PyPDF2.generic import (
+        ArrayObject,
+        DecodedStreamObject,
+        DictionaryObject,
+        FloatObject,
+        NameObject,
+        NumberObject,
+        TextStringObject,
+    )
+
+    rng = random.Random(seed)
+    writer = PdfWriter()
+    for _ in range(max(1, -(-field_count // FIELDS_PER_PAGE))):
+        writer.add_blank_page(612, 792)
+    page_refs = list(writer._pages.get_object()['/Kids'])
+
+    appearance = DecodedStreamObject()
+    appearance.set_data(b'q 0 0 1 rg 0 0 10 10 re f Q')
+    appearance.update({NameObject('/Type'): NameObject('/XObject'), NameObject('/Subtype'): NameObject('/Form'),
+                       NameObject('/BBox'): ArrayObject([NumberObject(0), NumberObject(0), NumberObject(10), NumberObject(10)])})
+    appearance_ref = writer._add_object(appearance)
+
+    def rect(slot):
+        x, y = 40 + (slot % 4) * 140, 740 - (slot // 4) * 18
+        return ArrayObject([FloatObject(x), FloatObject(y), FloatObject(x + 120), FloatObject(y + 14)])
+
+    def widget(page_ref, slot, states=None):
+        annotation = DictionaryObject({
+            NameObject('/Type'): NameObject('/Annot'),
+            NameObject('/Subtype'): NameObject('/Widget'),
+            NameObject('/Rect'): rect(slot),
+            NameObject('/P'): page_ref,
+        })
+        if states:
+            normal = DictionaryObject({NameObject(state): appearance_ref for state in states})
+            annotation[NameObject('/AP')] = DictionaryObject({NameObject('/N'): normal})
+            annotation[NameObject('/AS')] = NameObject('/Off')
+        return annotation
+
+    fields = ArrayObject()
+    for i in range(field_count):
+        page_ref = page_refs[i // FIELDS_PER_PAGE]
+        slot = i % FIELDS_PER_PAGE
+        kind = rng.random()
+        if kind < 0.6:
+            field = widget(page_ref, slot)
+            field.update({NameObject('/FT'): NameObject('/Tx'), NameObject('/T'): TextStringObject(f'Text{i}'),
+                          NameObject('/MaxLen'): NumberObject(40)})
+            refs = [writer._add_object(field)]
+            fields.append(refs[0])
+        elif kind < 0.8:
+            field = widget(page_ref, slot, ['/1', '/Off'])
+            field.update({NameObject('/FT'): NameObject('/Btn'), NameObject('/T'): TextStringObject(f'Check Box{i}'),
+                          NameObject('/Ff'): NumberObject(0)})
+            refs = [writer._add_object(field)]
+            fields.append(refs[0])
+        else:
+            parent = DictionaryObject({
+                NameObject('/FT'): NameObject('/Btn'),
+                NameObject('/T'): TextStringObject(f's{i}'),
+                NameObject('/Ff'): NumberObject(49152),
+                NameObject('/V'): NameObject('/Off'),
+            })
+            parent_ref = writer._add_object(parent)
+            kids = ArrayObject()
+            refs = []
+            for state in range(7):
+                kid = widget(page_ref, slot, [f'/{state}', '/Off'])
+                kid[NameObject('/Parent')] = parent_ref
+                kid_ref = writer._add_object(kid)
+                kids.append(kid_ref)
+                refs.append(kid_ref)
+            parent[NameObject('/Kids')] = kids
+            fields.append(parent_ref)
+        page = page_ref.get_object()
+        if '/Annots' not in page:
+            page[NameObject('/Annots')] = ArrayObject()
+        page['/Annots'].extend(refs)
+
+    acroform = DictionaryObject({NameObject('/Fields'): fields})
+    writer._root_object[NameObject('/AcroForm')] = writer._add_object(acroform)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        writer.write(f)
+    os.replace(tmp_path, path)
+
+
+def _fill_values(catalog):
+    """A value for every field of a synthetic form"""
+    values = {}
+    for name, entry in catalog['fields'].items():
+        if entry['type'] == '/Tx':
+            values[name] = f'value {name}'
+        elif entry['flags'] & (1 << 15):
+            values[name] = len(name) % 7
+        else:
+            values[name] = True
+    return values
+
+
+# ==================== MEASUREMENT ====================
+
+def measure(fn, repeat):
+    """(best wall seconds over `repeat` runs, tracemalloc peak KiB of one run)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 1024
+
+
+def _course_blocks(text):
+    """Table blocks and quiz section texts of a manual, for the per-stage runs"""
+    tables, quizzes = [], []
+    table, quiz = [], None
+    for line in text.split('\n'):
+        if line.startswith('|'):
+            table.append(line)
+            continue
+        if table:
+            tables.append('\n'.join(table))
+            table = []
+        if line.startswith('#'):
+            if quiz is not None:
+                quizzes.append('\n'.join(quiz) + '\n')
+            quiz = [] if line.startswith('### ') and 'quiz' in line.lower() else None
+        elif quiz is not None:
+            quiz.append(line)
+    if quiz is not None:
+        quizzes.append('\n'.join(quiz) + '\n')
+    return tables, quizzes
+
+
+def course_stages(scale):
+    """(stage name, callable) pairs for one manual size"""
+    path = os.path.join(inputs_dir, f'manual-{scale}x.md')
+    if not os.path.exists(path):
+        os.makedirs(inputs_dir, exist_ok=True)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            f.write(synthetic_manual(scale))
+        os.replace(f'{path}.tmp', path)
+
+    text = convert_modules.read_parsed_content(path)
+    lines = text.splitlines(True)
+    tables, quizzes = _course_blocks(text)
+    course = convert_modules.parse_course(lines)
+    records = [convert_modules.module_record(module) for module in course.modules]
+
+    return [
+        ('read', lambda: convert_modules.read_parsed_content(path)),
+        ('parse', lambda: convert_modules.parse_course(lines)),
+        ('tables', lambda: [convert_modules.markdown_table_to_html(table) for table in tables]),
+        ('quizzes', lambda: [convert_modules.extract_quiz_questions(quiz) for quiz in quizzes]),
+        ('render_ts', lambda: [convert_modules.render_module(record) for record in records]),
+        ('search_index', lambda: convert_modules.build_search_index(records)),
+    ]
+
+
+def pdf_stages(field_count):
+    """(stage name, callable) pairs for one synthetic form size"""
+    import PyPDF2
+
+    path = os.path.join(inputs_dir, f'form-{field_count}.pdf')
+    if not os.path.exists(path):
+        os.makedirs(inputs_dir, exist_ok=True)
+        synthetic_form_pdf(path, field_count)
+
+    catalog = build_catalog(path)
+    values = _fill_values(catalog)
+    names = list(catalog['fields'])[-20:]
+    form = TemplateForm(path)
+
+    def fill(incremental):
+        update = form.fill(values)
+        out = io.BytesIO()
+        if incremental:
+            form.write_incremental(out, update)
+        else:
+            form.write_full(out, update)
+
+    return [
+        ('get_fields', lambda: PyPDF2.PdfReader(path).get_fields()),
+        ('catalog_build', lambda: build_catalog(path)),
+        ('resolve_20', lambda: FieldResolver(PyPDF2.PdfReader(path)).resolve(names)),
+        ('fill_full', lambda: fill(False)),
+        ('fill_incremental', lambda: fill(True)),
+    ]
+
+
+# ==================== RESULTS ====================
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_run(path, settings):
+    """
+    The last recorded run made with the same settings (repeat, scales and
+    fields), or None; timings from other settings are not comparable.
+    """
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if all(record.get(key) == value for key, value in settings.items()):
+                last = record
+    return last
+
+
+def _delta(current, previous):
+    if not previous:
+        return ''
+    change = (current - previous) / previous
+    flag = '  ⚠ regression' if change > REGRESSION_THRESHOLD else ''
+    return f' ({change:+.0%}){flag}'
+
+
+def run(args):
+    history = os.path.join(results_dir, 'history.jsonl')
+    settings = {'repeat': args.repeat, 'scales': args.scales, 'fields': args.fields}
+    before = previous_run(history, settings)
+    before_results = before['results'] if before else {}
+
+    plan = []
+    if args.only in (None, 'course'):
+        plan += [(f'course@{scale}x', lambda scale=scale: course_stages(scale)) for scale in args.scales]
+    if args.only in (None, 'pdf'):
+        plan += [(f'pdf@{count}', lambda count=count: pdf_stages(count)) for count in args.fields]
+
+    results = {}
+    for group, stages in plan:
+        print(group)
+        for stage, fn in stages():
+            key = f'{group}/{stage}'
+            seconds, peak_kib = measure(fn, args.repeat)
+            results[key] = {'seconds': round(seconds, 6), 'peak_kib': round(peak_kib, 1)}
+            previous = before_results.get(key, {})
+            print(f"  {stage:18} {seconds * 1000:10.1f} ms{_delta(seconds, previous.get('seconds')):24}"
+                  f" peak {peak_kib / 1024:8.2f} MiB{_delta(peak_kib, previous.get('peak_kib'))}")
+
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        **settings,
+        'results': results,
+    }
+    if not args.no_save:
+        os.makedirs(results_dir, exist_ok=True)
+        with open(history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"Saved to {history}")
+    return 0
+
+
+def _int_list(text):
+    return [int(part) for part in text.split(',') if part]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Benchmark the course converter and PDF tooling.')
+    parser.add_argument('--only', choices=('course', 'pdf'), help='run one benchmark group')
+    parser.add_argument('--scales', type=_int_list, help='manual sizes, e.g. 1,10,100 (default: 1,10,100)')
+    parser.add_argument('--fields', type=_int_list, help='form sizes in fields (default: 300,1000,3000)')
+    parser.add_argument('--repeat', type=int, help='timed runs per stage, best is kept (default: 3)')
+    parser.add_argument('--quick', action='store_true',
+                        help='default to --scales 1,10 --fields 300 --repeat 1 for options not given')
+    parser.add_argument('--no-save', action='store_true', help='do not append to the history')
+    args = parser.parse_args(argv)
+    defaults = QUICK_DEFAULTS if args.quick else FULL_DEFAULTS
+    for name, value in defaults.items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Build the download manifest for the assets in public/docs.
+
+For every PDF, DOCX and PNG the manifest records the size, SHA-256 and a
+strong ETag derived from it, the MIME type and the last-modified time; PDFs
+also get their page count, AcroForm field count and whether they are
+linearized. /api/download answers HEAD, conditional and range requests from
+this manifest instead of stat-ing or reading the files.
+
+Files are described in a process pool. A rebuild reuses the previous entry
+of any file whose size and mtime are unchanged, so only new or modified
+assets are hashed and parsed again.
+
+Usage:
+    python3 build_asset_manifest.py [--docs-dir DIR] [--output PATH] [--workers N] [--force]
+"""
+
+import argparse
+import email.utils
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from linearize_pdf import is_linearized
+from pdf_field_catalog import file_sha256
+from pdf_field_resolver import iter_fields
+
+docs_dir = 'public/docs'
+manifest_path = 'data/generated/asset-manifest.json'
+
+# Bump when the entry format changes so every asset is described again
+MANIFEST_VERSION = 1
+
+MIME_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.png': 'image/png',
+}
+
+
+def pdf_details(path):
+    """Page count, terminal AcroForm field count and linearization of a PDF"""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    root = reader.trailer['/Root']
+    fields = 0
+    if '/AcroForm' in root:
+        fields = sum(1 for _ in iter_fields(root['/AcroForm'].get('/Fields', [])))
+    return {'pages': len(reader.pages), 'formFields': fields, 'linearized': is_linearized(path)}
+
+
+def describe_asset(path, size, mtime_ns):
+    """Manifest entry for one file (runs in a worker process)"""
+    sha256 = file_sha256(path)
+    entry = {
+        'path': path.replace(os.sep, '/'),
+        'size': size,
+        'mtimeNs': mtime_ns,
+        'lastModified': email.utils.formatdate(mtime_ns / 1e9, usegmt=True),
+        'sha256': sha256,
+        'etag': f'"{sha256[:32]}"',
+        'mimeType': MIME_TYPES[os.path.splitext(path)[1].lower()],
+    }
+    if entry['mimeType'] == 'application/pdf':
+        try:
+            entry.update(pdf_details(path))
+        except Exception as e:
+            entry['error'] = f'{type(e).__name__}: {e}'
+    return entry
+
+
+def scan(directory):
+    """(file name, path, size, mtime_ns) of each servable asset"""
+    assets = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.splitext(name)[1].lower() in MIME_TYPES and os.path.isfile(path):
+            stat = os.stat(path)
+            assets.append((name, path, stat.st_size, stat.st_mtime_ns))
+    return assets
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get('assets', {}) if manifest.get('version') == MANIFEST_VERSION else {}
+
+
+def build_manifest(directory, previous, workers=None, force=False):
+    """Return (assets, names described again)"""
+    assets = {}
+    stale = []
+    for name, path, size, mtime_ns in scan(directory):
+        old = previous.get(name)
+        if not force and old and old['size'] == size and old['mtimeNs'] == mtime_ns and 'error' not in old:
+            assets[name] = old
+        else:
+            stale.append((name, path, size, mtime_ns))
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(stale))) as pool:
+            futures = {name: pool.submit(describe_asset, path, size, mtime_ns) for name, path, size, mtime_ns in stale}
+            for name, future in futures.items():
+                assets[name] = future.result()
+    return dict(sorted(assets.items())), [name for name, *_ in stale]
+
+
+def write_manifest(path, assets):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'assets': assets}, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Build the public/docs download manifest.')
+    parser.add_argument('--docs-dir', default=docs_dir)
+    parser.add_argument('--output', default=manifest_path)
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='describe every asset again')
+    args = parser.parse_args(argv)
+
+    assets, described = build_manifest(args.docs_dir, load_manifest(args.output), args.workers, args.force)
+    write_manifest(args.output, assets)
+
+    failed = False
+    for name in described:
+        entry = assets[name]
+        if 'error' in entry:
+            failed = True
+            print(f"✗ {name}: {entry['error']}", file=sys.stderr)
+            continue
+        details = f", {entry['pages']} pages, {entry['formFields']} fields" if 'pages' in entry else ''
+        print(f"✓ {name}: {entry['size']:,} bytes{details}")
+    print(f"{args.output}: {len(assets)} assets ({len(described)} described, {len(assets) - len(described)} unchanged)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
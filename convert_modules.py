@@ -3,11 +3,69 @@
 Convert PARSED_COURSE_CONTENT.md to modules.ts
 This script processes the parsed markdown and converts it to TypeScript format
 with HTML tables, visual components, and proper formatting.
+
+The markdown is parsed in one streaming pass (CourseParser): modules,
+sections, tables, quizzes and references are all picked up line by line, so
+conversion time grows linearly with the document. The result is a small
+AST of slotted nodes (Course, Module, Section, Text/Heading/Table blocks,
+Question, Reference) that every output is generated from. It is pickled to
+.course-build/ keyed by the source's SHA-256, so a run over an unchanged
+source loads the AST instead of parsing the markdown again.
+
+Regeneration is incremental: a manifest of per-module and per-section
+content hashes is kept in .course-build/, only modules whose source changed
+are re-rendered, and the output is left untouched when nothing in it would
+change.
+
+Each module is also written as its own JSON chunk (full and preview
+variants) under data/generated/modules/ with a small index.json of module
+metadata and section ids, so the module API can load one module at a time.
+The module API's response bodies are pre-rendered next to them, with gzip
+(and, when the brotli package is installed, brotli) variants and strong
+ETags in payloads/payloads.json. quiz-bank.json holds every module's quiz
+questions and answer indexes by question id for grading, and
+references.json is the deduplicated citation table the chunks point into
+by id; search-index.json is an inverted index (stemmed terms -> section,
+quiz and reference postings with positions and snippets) for course search.
+
+Usage:
+    python3 convert_modules.py [PARSED_COURSE_CONTENT.md] [--output data/generated/modules.ts]
+    python3 convert_modules.py --watch      # re-convert on every save
+    python3 convert_modules.py --force      # ignore the caches
 """
 
-import re
+import argparse
+import gzip
+import hashlib
+import io
 import json
+import os
+import pickle
+import re
+import sys
+import time
+
+import stage_profiler
+from stage_profiler import profiled
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+MODULE_HEADING = re.compile(r'^## MODULE (\d+):\s*(.+?)\s*$', re.IGNORECASE)
+SUBTITLE_LINE = re.compile(r'^\*\*Subtitle:\*\*\s*(.*)$')
+QUIZ_QUESTION = re.compile(r'(\d+)\.\s+(\S.*)')
+QUIZ_OPTION_LABEL = re.compile(r'[A-Za-z][.)]\s+')
+
+# Module 1 teaser citations; they share reference table ids with Module 1
+TEASER_REFERENCES = (
+    'Bain, A. C., & Meaney, D. F. (2000). Brain injury model challenges. *Journal of Neurotrauma*, 17(1), 1-8.',
+    'Brenner, J. S., et al. (2016). Concussions in youth sports. *Pediatrics*, 138(1), e20160903.',
+    'Giza, C. C., & Hovda, D. A. (2001). The neurometabolic cascade of concussion. *Neurosurgery Clinics of North America*, 12(1), 1-8.',
+)
 
+@profiled
 def read_parsed_content(file_path):
     """Read the parsed markdown file"""
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -20,6 +78,7 @@ def escape_typescript_string(text):
     text = text.replace('\n', '\\n')
     return text
 
+@profiled
 def markdown_table_to_html(table_text):
     """Convert markdown table to HTML table"""
     lines = [line.strip() for line in table_text.strip().split('\n') if line.strip()]
@@ -53,111 +112,363 @@ def markdown_table_to_html(table_text):
     html.append('</table>')
     return '\n'.join(html)
 
-def extract_module_content(content, module_num, module_title):
-    """Extract content for a specific module"""
-    pattern = rf'## MODULE {module_num}: {module_title}(.*?)(?=## MODULE \d+:|## APPENDIX|---\n\n\*End of)'
-    match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
-    return None
-
-def parse_sections(module_content):
-    """Parse sections from module content"""
-    sections = []
-    current_section = None
-    current_content = []
-
-    lines = module_content.split('\n')
-    for line in lines:
-        # Skip learning objectives section for now
-        if line.startswith('### Learning Objectives'):
-            if current_section:
-                sections.append({
-                    'id': current_section,
-                    'title': current_section.replace('-', ' ').title(),
-                    'content': current_content
-                })
-            current_section = 'learning-objectives'
-            current_content = []
+def section_id(title):
+    """Section id derived from its heading"""
+    return title.lower().replace(' ', '-').replace('/', '-')
+
+def _section_kind(title):
+    """'quiz' and 'references' sections are collected separately from content"""
+    if 'quiz' in title.lower():
+        return 'quiz'
+    if title.rstrip().endswith('References'):
+        return 'references'
+    return 'content'
+
+class Node:
+    """
+    Base of the course AST nodes.
+
+    Nodes are slotted, so they carry no per-instance __dict__, and pickle as
+    a bare tuple of their slot values, which keeps the cached AST compact
+    and quick to load.
+    """
+
+    __slots__ = ()
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__getstate__() == other.__getstate__()
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+class Course(Node):
+    """The whole manual: its modules and the non-module parts around them"""
+    __slots__ = ('title', 'subtitle', 'modules', 'parts')
+
+    def __init__(self):
+        self.title = None
+        self.subtitle = None
+        self.modules = []
+        self.parts = []
+
+class Part(Node):
+    """A non-module `## ` part (introduction, appendix, ...)"""
+    __slots__ = ('title', 'sections', 'sha256', 'section_sha256')
+
+    def __init__(self, title):
+        self.title = title
+        self.sections = []
+        self.sha256 = None
+        self.section_sha256 = {}
+
+class Module(Node):
+    """
+    A `## MODULE n:` part. `sha256` and `section_sha256` hash its raw
+    source lines; `quiz_problems` lists the quiz questions that were skipped.
+    """
+    __slots__ = ('number', 'title', 'subtitle', 'sections', 'quiz', 'references',
+                 'quiz_problems', 'sha256', 'section_sha256')
+
+    def __init__(self, number, title):
+        self.number = number
+        self.title = title
+        self.subtitle = ''
+        self.sections = []
+        self.quiz = []
+        self.references = []
+        self.quiz_problems = []
+        self.sha256 = None
+        self.section_sha256 = {}
+
+class Section(Node):
+    """A `### ` content section: a list of Text, Heading and Table blocks"""
+    __slots__ = ('id', 'title', 'blocks')
+
+    def __init__(self, title):
+        self.id = section_id(title)
+        self.title = title
+        self.blocks = []
+
+    def content(self):
+        """The section's content lines as they appear in modules.ts"""
+        lines = []
+        for block in self.blocks:
+            lines.extend(block.lines())
+        return lines
+
+class Text(Node):
+    """One stripped line of section text (blank lines included)"""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def lines(self):
+        return [self.text]
+
+class Heading(Node):
+    """A `#### ` subsection heading"""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def lines(self):
+        return [f'<h4>{self.text}</h4>']
+
+class Table(Node):
+    """A markdown table, kept as its raw `|` rows"""
+    __slots__ = ('rows',)
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def lines(self):
+        return markdown_table_to_html('\n'.join(self.rows)).split('\n')
+
+class Question(Node):
+    """An auto-gradable quiz question; `correct_answer` indexes `options`"""
+    __slots__ = ('id', 'question', 'options', 'correct_answer', 'explanation')
+
+    def __init__(self, id, question, options, correct_answer, explanation=''):
+        self.id = id
+        self.question = question
+        self.options = options
+        self.correct_answer = correct_answer
+        self.explanation = explanation
+
+class Reference(Node):
+    """A citation line from a module's references section, as written"""
+    __slots__ = ('citation',)
+
+    def __init__(self, citation):
+        self.citation = citation
+
+class CourseParser:
+    """
+    Single pass over the parsed course markdown, building the course AST.
+
+    Lines are fed one at a time and routed by heading level: `## MODULE n:`
+    starts a Module, any other `## ` heading starts a non-module Part
+    (introduction, appendix, ...), `### ` starts a Section and `#### ` a
+    Heading block. Consecutive `|` rows are collected into one Table block
+    when the block ends. Quiz and reference sections are collected into the
+    module's quiz and references instead of its sections; a quiz section's
+    lines go through extract_quiz_questions when the section ends.
+
+    The raw lines of every module and section are hashed as they stream
+    past, so callers can tell which parts of the document changed without
+    a second read.
+    """
+
+    def __init__(self):
+        self.course = Course()
+        self.container = None
+        self.section = None
+        self.kind = None
+        self.table = []
+        self.quiz = None
+        self.container_digest = None
+        self.section_digest = None
+
+    def feed(self, line):
+        line = line.rstrip('\n')
+        self._route(line)
+        data = line.encode('utf-8') + b'\n'
+        for digest in (self.container_digest, self.section_digest):
+            if digest is not None:
+                digest.update(data)
+
+    def _route(self, line):
+        if line.startswith('|'):
+            self.table.append(line)
+            return
+        if self.table:
+            self._flush_table()
+
+        if line.startswith('## ') and self.container is None and self.course.title and self.course.subtitle is None:
+            self.course.subtitle = line[3:].strip()
+        elif line.startswith('## '):
+            self._close_section()
+            self._open_container(line)
         elif line.startswith('### '):
-            if current_section:
-                sections.append({
-                    'id': current_section,
-                    'title': current_section.replace('-', ' ').title(),
-                    'content': current_content
-                })
-            section_title = line[4:].strip()
-            current_section = section_title.lower().replace(' ', '-').replace('/', '-')
-            current_content = []
+            self._close_section()
+            self._open_section(line[4:].strip())
+        elif line.startswith('# '):
+            self.course.title = line[2:].strip()
+        elif self.container is None or line.strip() in ('', '---'):
+            if self.quiz is not None:
+                self.quiz.append(line)
+        elif self.section is None:
+            subtitle = SUBTITLE_LINE.match(line)
+            if subtitle and isinstance(self.container, Module):
+                self.container.subtitle = subtitle.group(1).strip()
+        elif self.kind == 'quiz':
+            self.quiz.append(line)
+        elif self.kind == 'references':
+            if line.startswith('- '):
+                self.container.references.append(Reference(line[2:].strip()))
         elif line.startswith('#### '):
-            subsection_title = line[5:].strip()
-            current_content.append(f'<h4>{subsection_title}</h4>')
-        elif line.startswith('| '):
-            # Table row - collect entire table
-            table_lines = [line]
-            continue
+            self.section.blocks.append(Heading(line[5:].strip()))
         else:
-            if line.strip():
-                current_content.append(line.strip())
+            self.section.blocks.append(Text(line.strip()))
 
-    if current_section:
-        sections.append({
-            'id': current_section,
-            'title': current_section.replace('-', ' ').title(),
-            'content': current_content
-        })
+    def close(self):
+        """Flush any open block and return the Course"""
+        if self.table:
+            self._flush_table()
+        self._close_section()
+        self._close_container()
+        return self.course
 
-    return sections
+    def _open_container(self, line):
+        self._close_container()
+        self.container_digest = hashlib.sha256()
+        heading = MODULE_HEADING.match(line)
+        if heading:
+            self.container = Module(int(heading.group(1)), heading.group(2))
+            self.course.modules.append(self.container)
+        else:
+            self.container = Part(line[3:].strip())
+            self.course.parts.append(self.container)
 
-def extract_quiz_questions(module_content):
-    """Extract quiz questions from module content"""
-    questions = []
-    quiz_pattern = r'\*\*(\d+)\.\s+(.*?)\*\*\n((?:- .*?\n)+)'
-    matches = re.finditer(quiz_pattern, module_content, re.MULTILINE)
-
-    for match in matches:
-        question_num = match.group(1)
-        question_text = match.group(2)
-        options_text = match.group(3)
-
-        options = []
-        correct_idx = -1
-        for i, line in enumerate(options_text.strip().split('\n')):
-            option = line.strip('- ').strip()
-            if option.startswith('**') and option.endswith('**'):
-                option = option[2:-2]
-                correct_idx = i
-            options.append(option)
-
-        questions.append({
-            'id': f'q{question_num}',
-            'question': question_text,
-            'options': options,
-            'correctAnswer': correct_idx
-        })
-
-    return questions
-
-def extract_references(module_content):
-    """Extract clinical references from module content"""
-    refs = []
-    ref_pattern = r'^- (.+)$'
-    in_refs = False
+    def _close_container(self):
+        if self.container is not None and self.container_digest is not None:
+            self.container.sha256 = self.container_digest.hexdigest()
+        self.container_digest = None
+
+    def _open_section(self, title):
+        if self.container is None:
+            return
+        self.kind = _section_kind(title) if isinstance(self.container, Module) else 'content'
+        self.section = Section(title)
+        if self.kind == 'quiz':
+            self.quiz = []
+        self.section_digest = hashlib.sha256()
+
+    def _close_section(self):
+        section, self.section = self.section, None
+        if section is None:
+            return
+        self.container.section_sha256[section.id] = self.section_digest.hexdigest()
+        self.section_digest = None
+        if self.kind == 'quiz':
+            quiz, self.quiz = self.quiz, None
+            questions, problems = extract_quiz_questions('\n'.join(quiz))
+            taken = {question.id for question in self.container.quiz}
+            for question in questions:
+                base, suffix = question.id, 2
+                while question.id in taken:
+                    question.id = f'{base}-{suffix}'
+                    suffix += 1
+                taken.add(question.id)
+                self.container.quiz.append(question)
+            self.container.quiz_problems.extend(f"{section.title}: {problem}" for problem in problems)
+        elif self.kind == 'content':
+            self.container.sections.append(section)
+
+    def _flush_table(self):
+        rows, self.table = self.table, []
+        if self.section is None or self.kind != 'content':
+            return
+        self.section.blocks.append(Table(rows))
+
+@profiled
+def parse_course(lines):
+    """Parse an iterable of markdown lines (e.g. an open file) into a Course"""
+    parser = CourseParser()
+    for line in lines:
+        parser.feed(line)
+    return parser.close()
+
+def parse_course_file(file_path):
+    """Stream a parsed-content markdown file through the parser"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_course(f)
 
+class QuizParser:
+    """
+    Line-oriented quiz parser; each line is looked at once, so worst-case
+    time is linear in the quiz text however malformed it is.
+
+    A question is a `**N. text**` line followed by `- ` option lines. The
+    correct option is the bold one, in either of the manual's styles
+    (`- b) **text**` or `- **B. text**`); option letters are dropped.
+    Questions without options (`(Short Answer)`) are not auto-gradable and
+    are skipped, as are questions with no or several bold options, which
+    are reported in `problems`.
+    """
+
+    def __init__(self):
+        self.questions = []
+        self.problems = []
+        self.current = None
+
+    def feed(self, line):
+        text = line.strip()
+        if text.startswith('**') and text.endswith('**') and len(text) > 4:
+            question = QUIZ_QUESTION.match(text[2:-2].strip())
+            if question:
+                self._finish()
+                self.current = {'number': question.group(1), 'question': question.group(2).strip(),
+                                'options': [], 'correct': []}
+                return
+        if self.current is None:
+            return
+        if text.startswith('- '):
+            option, correct = _quiz_option(text[2:].strip())
+            if correct:
+                self.current['correct'].append(len(self.current['options']))
+            self.current['options'].append(option)
+        elif text and self.current['options']:
+            self._finish()
+
+    def close(self):
+        self._finish()
+        return self.questions
+
+    def _finish(self):
+        current, self.current = self.current, None
+        if current is None or not current['options']:
+            return
+        label = f"question {current['number']}"
+        if len(current['correct']) != 1:
+            self.problems.append(f"{label}: {len(current['correct'])} answers marked")
+            return
+        self.questions.append(Question(f"q{current['number']}", current['question'],
+                                       current['options'], current['correct'][0]))
+
+def _strip_bold(text):
+    if text.startswith('**') and text.endswith('**') and len(text) > 4:
+        return text[2:-2].strip(), True
+    return text, False
+
+def _quiz_option(text):
+    """(option text, is correct) for the text after `- `"""
+    text, correct = _strip_bold(text)
+    label = QUIZ_OPTION_LABEL.match(text)
+    if label:
+        text = text[label.end():]
+    text, bold = _strip_bold(text)
+    return text, correct or bold
+
+@profiled
+def extract_quiz_questions(module_content):
+    """(questions, problems) for the text of a quiz section"""
+    parser = QuizParser()
     for line in module_content.split('\n'):
-        if 'References' in line:
-            in_refs = True
-            continue
-        if in_refs and line.startswith('- '):
-            refs.append(line[2:].strip())
-        elif in_refs and line.strip() == '':
-            continue
-        elif in_refs and line.startswith('#'):
-            break
-
-    return refs
-
-def generate_module_1_teaser():
+        parser.feed(line)
+    return parser.close(), parser.problems
+
+def generate_module_1_teaser(references=TEASER_REFERENCES):
     """Generate Module 1 as teaser only"""
     return """  {
     id: 1,
@@ -285,11 +596,684 @@ def generate_module_1_teaser():
       },
     ],
     quiz: [],
-    clinicalReferences: [
-      'Bain, A. C., & Meaney, D. F. (2000). Brain injury model challenges. Journal of Neurotrauma, 17(1), 1-8.',
-      'Brenner, J. S., et al. (2016). Concussions in youth sports. Pediatrics, 138(1), e20160903.',
-      'Giza, C. C., & Hovda, D. A. (2001). The neurometabolic cascade of concussion. Neurosurgery Clinics of North America, 12(1), 1-8.',
-    ],
+    clinicalReferences: """ + _ts_list([normalize_citation(ref) for ref in references], 4) + """,
   },"""
 
-print("Module conversion script created. Run with Python to generate modules.")
+MODULES_TS_HEADER = """export interface Module {
+  id: number
+  title: string
+  subtitle: string
+  duration: string
+  points: number
+  description: string
+  videoUrl: string
+  videoRequiredMinutes: number
+  sections: Section[]
+  quiz: QuizQuestion[]
+  clinicalReferences: string[]
+}
+
+export interface Section {
+  id: string
+  title: string
+  content: string[]
+}
+
+export interface QuizQuestion {
+  id: string
+  question: string
+  options: string[]
+  correctAnswer: number
+  explanation: string
+}
+
+export const modules: Module[] = [
+"""
+
+MODULES_TS_FOOTER = """]
+
+export function getModuleById(id: number): Module | undefined {
+  return modules.find((module) => module.id === id)
+}
+
+export function getAllModules(): Module[] {
+  return modules
+}
+"""
+
+# Fields the markdown does not carry, as listed in data/modules.ts
+MODULE_METADATA = {
+    1: {'duration': '90 min', 'points': 5, 'videoUrl': '/videos/module-1-concussion-science.mp4',
+        'description': 'Comprehensive understanding of concussion biomechanics, pathophysiology, neuroanatomy, biochemistry, imaging, biomarkers, and clinical implications.'},
+    2: {'duration': '90 min', 'points': 5, 'videoUrl': '/videos/module-2-diagnosis-assessment.mp4',
+        'description': 'Master diagnostic criteria and assessment tools: SCAT6, VOMS, BESS, cranial nerve screening, and cervical evaluation across age groups.'},
+    3: {'duration': '120 min', 'points': 5, 'videoUrl': '/videos/module-3-practical-assessment.mp4',
+        'description': 'Master practical procedures for cervical assessment, cranial nerve examination, VOMS, BESS, clinical decision-making, and acute management protocols.'},
+    4: {'duration': '90 min', 'points': 5, 'videoUrl': '/videos/module-4-pcs-longterm.mp4',
+        'description': 'Understanding persistent post-concussive symptoms, chronic traumatic encephalopathy, long-term outcomes, and management of complex cases beyond 4 weeks.'},
+    5: {'duration': '75 min', 'points': 5, 'videoUrl': '/videos/module-5-multidisciplinary.mp4',
+        'description': 'Understand the roles of healthcare professionals in comprehensive concussion care, referral pathways, team communication, and coordinated management strategies.'},
+    6: {'duration': '60 min', 'points': 5, 'videoUrl': '/videos/module-6-return-protocols.mp4',
+        'description': 'Master graduated return-to-activity protocols for sport, work, and school, including clearance criteria, accommodations, and preventing premature return.'},
+    7: {'duration': '90 min', 'points': 5, 'videoUrl': '/videos/module-7-rehabilitation-phenotypes.mp4',
+        'description': 'Apply phenotype-specific rehabilitation protocols for vestibular, oculomotor, cervicogenic, cognitive-fatigue, post-traumatic migraine, and anxiety/mood presentations.'},
+    8: {'duration': '60 min', 'points': 5, 'videoUrl': '/videos/module-8-legal-ethical.mp4',
+        'description': 'Navigate legal responsibilities, ethical obligations, effective communication strategies, and comprehensive documentation requirements in concussion management.'},
+}
+
+SMALL_WORDS = {'a', 'an', 'and', 'as', 'at', 'by', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'vs'}
+
+# Bump when render_module's output changes so cached chunks are re-rendered
+RENDER_VERSION = 2
+
+# Bump when the AST node classes or CourseParser change so cached ASTs are rebuilt
+AST_VERSION = 1
+
+source_path = 'PARSED_COURSE_CONTENT.md'
+output_path = 'data/generated/modules.ts'
+build_dir = '.course-build'
+chunks_path = 'data/generated/modules'
+
+# Sections served to preview users (matches app/api/modules/[id]/route.ts)
+PREVIEW_SECTIONS = 2
+
+# (module variant, access level) pairs the module API answers with; preview
+# users are served the SCAT modules, never a paid module's payload
+PAYLOAD_VARIANTS = (('full', 'online-only'), ('full', 'full-course'))
+
+# Search index tokenisation; STOPWORDS and STEM_SUFFIXES are mirrored in lib/module-chunks.ts
+SEARCH_TOKEN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or that the their this to was were which with'.split()
+)
+STEM_SUFFIXES = (('ies', 'y'), ('ied', 'y'), ('sses', 'ss'), ('ing', ''), ('ed', ''), ('ly', ''), ('es', ''), ('s', ''))
+SNIPPET_LENGTH = 160
+
+# Pre-compressed variants written for each payload
+CONTENT_CODINGS = ('gzip', 'br') if brotli is not None else ('gzip',)
+
+def title_case(text):
+    """'INTRODUCTION TO CONCUSSION' -> 'Introduction to Concussion'"""
+    if text != text.upper():
+        return text
+    words = text.lower().split(' ')
+    return ' '.join(
+        word if i and word in SMALL_WORDS else word[:1].upper() + word[1:]
+        for i, word in enumerate(words)
+    )
+
+def module_metadata(number):
+    """Duration, points, description and video for a module"""
+    metadata = {
+        'duration': '60 min',
+        'points': 5,
+        'description': '',
+        'videoUrl': f'/videos/module-{number}.mp4',
+        'videoRequiredMinutes': 1,
+    }
+    metadata.update(MODULE_METADATA.get(number, {}))
+    return metadata
+
+def _ts(text):
+    return "'" + escape_typescript_string(str(text)) + "'"
+
+def _ts_list(lines, indent):
+    """A string array, one item per line, in the modules.ts layout"""
+    if not lines:
+        return '[]'
+    pad = ' ' * indent
+    items = ''.join(f"{pad}  {_ts(line)},\n" for line in lines)
+    return f'[\n{items}{pad}]'
+
+def module_record(module):
+    """A Module node in the shape of the Module interface"""
+    metadata = module_metadata(module.number)
+    return {
+        'id': module.number,
+        'title': title_case(module.title),
+        'subtitle': module.subtitle,
+        'duration': metadata['duration'],
+        'points': metadata['points'],
+        'description': metadata['description'],
+        'videoUrl': metadata['videoUrl'],
+        'videoRequiredMinutes': metadata['videoRequiredMinutes'],
+        'sections': [
+            {'id': section.id, 'title': section.title, 'content': section.content()}
+            for section in module.sections
+        ],
+        'quiz': [
+            {
+                'id': question.id,
+                'question': question.question,
+                'options': question.options,
+                'correctAnswer': question.correct_answer,
+                'explanation': question.explanation,
+            }
+            for question in module.quiz
+        ],
+        'clinicalReferences': unique_citations(reference.citation for reference in module.references),
+    }
+
+@profiled
+def render_module(record):
+    """TypeScript object literal for one module record"""
+    out = ['  {', f"    id: {record['id']},"]
+    for key in ('title', 'subtitle', 'duration'):
+        out.append(f"    {key}: {_ts(record[key])},")
+    out.append(f"    points: {record['points']},")
+    for key in ('description', 'videoUrl'):
+        out.append(f"    {key}: {_ts(record[key])},")
+    out.append(f"    videoRequiredMinutes: {record['videoRequiredMinutes']},")
+
+    out.append('    sections: [' if record['sections'] else '    sections: [],')
+    for section in record['sections']:
+        out.append('      {')
+        out.append(f"        id: {_ts(section['id'])},")
+        out.append(f"        title: {_ts(section['title'])},")
+        out.append(f"        content: {_ts_list(section['content'], 8)},")
+        out.append('      },')
+    if record['sections']:
+        out.append('    ],')
+
+    out.append('    quiz: [' if record['quiz'] else '    quiz: [],')
+    for question in record['quiz']:
+        out.append('      {')
+        out.append(f"        id: {_ts(question['id'])},")
+        out.append(f"        question: {_ts(question['question'])},")
+        out.append(f"        options: {_ts_list(question['options'], 8)},")
+        out.append(f"        correctAnswer: {question['correctAnswer']},")
+        out.append(f"        explanation: {_ts(question['explanation'])},")
+        out.append('      },')
+    if record['quiz']:
+        out.append('    ],')
+
+    out.append(f"    clinicalReferences: {_ts_list(record['clinicalReferences'], 4)},")
+    out.append('  },')
+    return '\n'.join(out) + '\n'
+
+def preview_record(record):
+    """What preview users see: the first PREVIEW_SECTIONS sections"""
+    return dict(record, sections=record['sections'][:PREVIEW_SECTIONS])
+
+def index_entry(record):
+    """Module list metadata; no content, quiz, references or video URL"""
+    return {
+        'id': record['id'],
+        'title': record['title'],
+        'subtitle': record['subtitle'],
+        'duration': record['duration'],
+        'points': record['points'],
+        'description': record['description'],
+        'videoRequiredMinutes': record['videoRequiredMinutes'],
+        'sectionIds': [section['id'] for section in record['sections']],
+    }
+
+def _json_bytes(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def normalize_citation(text):
+    """Citation as displayed: markdown emphasis removed, whitespace collapsed"""
+    return re.sub(r'\s+', ' ', text.replace('*', '')).strip()
+
+def unique_citations(citations):
+    """Normalised citations with repeats of the same reference dropped"""
+    seen = {}
+    for citation in citations:
+        seen.setdefault(reference_id(citation), normalize_citation(citation))
+    return list(seen.values())
+
+def reference_id(citation):
+    """
+    Stable id for a citation: a hash of its letters and digits only, so
+    punctuation, emphasis and case differences map to the same reference
+    and ids do not shift when citations are added or reordered.
+    """
+    key = re.sub(r'[^0-9a-z]+', '', normalize_citation(citation).casefold())
+    return 'ref-' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:10]
+
+def build_reference_table(records, teaser=TEASER_REFERENCES):
+    """{'references': {id: citation}, 'modules': {module id: [ids]}} across the course"""
+    references = {}
+    modules = {}
+    sources = [(str(record['id']), record['clinicalReferences']) for record in records]
+    sources.append(('teaser', teaser))
+    for owner, citations in sources:
+        ids = []
+        for citation in citations:
+            ref_id = reference_id(citation)
+            references.setdefault(ref_id, normalize_citation(citation))
+            if ref_id not in ids:
+                ids.append(ref_id)
+        modules[owner] = ids
+    return {'references': references, 'modules': modules}
+
+def chunk_record(record):
+    """Module record for the JSON chunks: references by id into references.json"""
+    chunk = dict(record, clinicalReferenceIds=[reference_id(ref) for ref in record['clinicalReferences']])
+    del chunk['clinicalReferences']
+    return chunk
+
+@profiled
+def emit_reference_table(records, directory):
+    """Write references.json, the shared citation table"""
+    table = build_reference_table(records)
+    return write_if_changed(os.path.join(directory, 'references.json'), _json_bytes(table))
+
+@profiled
+def emit_module_chunks(records, directory, changed):
+    """
+    Write module-<n>.json, module-<n>.preview.json and index.json.
+
+    Chunks are only rewritten for modules in `changed` (or when missing);
+    the index is rebuilt every run but only written when it differs.
+    Returns the paths that were written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for record in records:
+        variants = (
+            (f"module-{record['id']}.json", chunk_record(record)),
+            (f"module-{record['id']}.preview.json", chunk_record(preview_record(record))),
+        )
+        for name, value in variants:
+            path = os.path.join(directory, name)
+            if record['id'] in changed or not os.path.exists(path):
+                if write_if_changed(path, _json_bytes(value)):
+                    written.append(path)
+
+    expected = {'index.json'}
+    expected.update(f"module-{record['id']}{suffix}.json" for record in records for suffix in ('', '.preview'))
+    for name in os.listdir(directory):
+        if name.startswith('module-') and name.endswith('.json') and name not in expected:
+            os.remove(os.path.join(directory, name))
+
+    index_path = os.path.join(directory, 'index.json')
+    index = {'modules': [index_entry(record) for record in records], 'previewSections': PREVIEW_SECTIONS}
+    if write_if_changed(index_path, _json_bytes(index)):
+        written.append(index_path)
+    return written
+
+def module_key(module):
+    """Cache key for a module's rendered output: source, metadata and renderer"""
+    digest = hashlib.sha256()
+    digest.update(f'{RENDER_VERSION}\n{module.sha256}\n'.encode('utf-8'))
+    digest.update(json.dumps(module_metadata(module.number), sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+@profiled
+def emit_quiz_bank(records, directory):
+    """
+    Write quiz-bank.json: {module id: {question id: question}} with the
+    options and answer index, so a quiz submission can be graded by
+    question id without loading any module content.
+    """
+    bank = {
+        'modules': {
+            str(record['id']): {
+                question['id']: {
+                    'question': question['question'],
+                    'options': question['options'],
+                    'correctAnswer': question['correctAnswer'],
+                }
+                for question in record['quiz']
+            }
+            for record in records
+        }
+    }
+    path = os.path.join(directory, 'quiz-bank.json')
+    return write_if_changed(path, _json_bytes(bank))
+
+def stem(word):
+    """Light suffix stripping; mirrored by stem() in lib/module-chunks.ts"""
+    for suffix, replacement in STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= 3:
+            if suffix == 's' and word.endswith(('ss', 'us', 'is')):
+                return word
+            return word[:-len(suffix)] + replacement
+    return word
+
+def search_terms(text):
+    """Stemmed index terms of a piece of text, in order, stopwords removed"""
+    return [stem(token) for token in SEARCH_TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+def plain_text(line):
+    """Content line without HTML tags or markdown emphasis"""
+    text = re.sub(r'<[^>]+>', ' ', line)
+    text = text.replace('**', '').replace('*', '')
+    text = re.sub(r'^[-•]\s+', '', text.strip())
+    return re.sub(r'\s+', ' ', text).strip()
+
+def _snippet(text):
+    if len(text) <= SNIPPET_LENGTH:
+        return text
+    return text[:SNIPPET_LENGTH].rsplit(' ', 1)[0] + '…'
+
+def search_documents(records):
+    """(doc, indexed text, snippet text) for every section, quiz question and reference"""
+    seen_references = set()
+    for record in records:
+        for section in record['sections']:
+            text = ' '.join(filter(None, (plain_text(line) for line in section['content'])))
+            doc = {'module': record['id'], 'section': section['id'], 'kind': 'section', 'title': section['title']}
+            yield doc, f"{section['title']} {text}", text
+        for question in record['quiz']:
+            text = ' '.join([question['question']] + question['options'])
+            doc = {'module': record['id'], 'section': question['id'], 'kind': 'quiz', 'title': question['question']}
+            yield doc, text, text
+        for reference in record['clinicalReferences']:
+            ref_id = reference_id(reference)
+            if ref_id in seen_references:
+                continue
+            seen_references.add(ref_id)
+            doc = {'module': record['id'], 'section': ref_id, 'kind': 'reference', 'title': reference}
+            yield doc, reference, reference
+
+def build_search_index(records):
+    """
+    Inverted index: stemmed term -> [[doc, position, ...], ...].
+
+    Documents are the sections, quiz questions and references of every
+    module, each with a short snippet so results can be shown without
+    loading the module. Positions are term offsets within the document
+    (title first), for phrase matching and highlighting.
+    """
+    docs = []
+    terms = {}
+    for doc, text, body in search_documents(records):
+        doc_id = len(docs)
+        doc['snippet'] = _snippet(body)
+        docs.append(doc)
+        positions = {}
+        for position, term in enumerate(search_terms(text)):
+            positions.setdefault(term, []).append(position)
+        for term, found in positions.items():
+            terms.setdefault(term, []).append([doc_id] + found)
+    return {'version': 1, 'docs': docs, 'terms': dict(sorted(terms.items()))}
+
+@profiled
+def emit_search_index(records, directory):
+    """Write search-index.json next to the module chunks"""
+    index = build_search_index(records)
+    return write_if_changed(os.path.join(directory, 'search-index.json'), _json_bytes(index))
+
+def payload_name(module_id, variant, access_level):
+    return f'module-{module_id}-{variant}-{access_level}'
+
+def _compressed(body):
+    """{content-coding: bytes} for a payload; gzip output is byte-stable (mtime 0)"""
+    encoded = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if 'br' in CONTENT_CODINGS:
+        encoded['br'] = brotli.compress(body, quality=11)
+    return encoded
+
+def _payload_current(entry, etag, directory):
+    """True when a previous payload has this ETag and all its files are present"""
+    if entry.get('etag') != etag:
+        return False
+    encodings = entry.get('encodings', {})
+    if set(encodings) != set(CONTENT_CODINGS):
+        return False
+    files = [entry.get('file', '')] + [encoded['file'] for encoded in encodings.values()]
+    return all(os.path.exists(os.path.join(directory, name)) for name in files)
+
+@profiled
+def emit_payloads(records, directory):
+    """
+    Pre-render the module API response bodies with gzip/brotli variants.
+
+    Each body is exactly what app/api/modules/[id] would send, so the route
+    can stream the stored bytes. The strong ETag is derived from the
+    body's SHA-256 (suffixed per content-coding), and compression only
+    runs for bodies whose hash changed. payloads.json lists the ETag and
+    available encodings per payload.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, 'payloads.json')
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get('payloads', {})
+    except (OSError, ValueError):
+        previous = {}
+
+    payloads = {}
+    compressed = 0
+    for record in records:
+        for variant, access_level in PAYLOAD_VARIANTS:
+            module = record if variant == 'full' else preview_record(record)
+            body = _json_bytes({'success': True, 'module': module, 'accessLevel': access_level})
+            name = payload_name(record['id'], variant, access_level)
+            digest = hashlib.sha256(body).hexdigest()[:32]
+            entry = {'etag': f'"{digest}"', 'encodings': {}}
+
+            old = previous.get(name, {})
+            if _payload_current(old, entry['etag'], directory):
+                entry['encodings'] = old['encodings']
+            else:
+                write_if_changed(os.path.join(directory, f'{name}.json'), body)
+                for coding, data in _compressed(body).items():
+                    extension = 'gz' if coding == 'gzip' else coding
+                    file_name = f'{name}.json.{extension}'
+                    write_if_changed(os.path.join(directory, file_name), data)
+                    entry['encodings'][coding] = {
+                        'file': file_name,
+                        'etag': f'"{digest}-{extension}"',
+                        'size': len(data),
+                    }
+                compressed += 1
+            entry['file'] = f'{name}.json'
+            entry['size'] = len(body)
+            payloads[name] = entry
+
+    keep = {'payloads.json'}
+    for entry in payloads.values():
+        keep.add(entry['file'])
+        keep.update(encoded['file'] for encoded in entry['encodings'].values())
+    for name in os.listdir(directory):
+        if name not in keep:
+            os.remove(os.path.join(directory, name))
+
+    write_if_changed(manifest_path, json.dumps({'payloads': payloads}, indent=2, sort_keys=True).encode('utf-8'))
+    return compressed
+
+def write_if_changed(path, data):
+    """Atomically write `data` unless the file already holds exactly those bytes"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    _write_atomic(path, data)
+    return True
+
+def load_manifest(directory=build_dir):
+    """The previous run's manifest, or an empty one"""
+    path = os.path.join(directory, 'manifest.json')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'modules': {}}
+    if manifest.get('version') != RENDER_VERSION:
+        return {'modules': {}}
+    return manifest
+
+def _course_cache_path(directory, key):
+    return os.path.join(directory, f'course-{key[:32]}.ast')
+
+@profiled
+def load_course(source=source_path, directory=build_dir, force=False):
+    """
+    (Course, cache hit) for `source`.
+
+    The AST is pickled under `directory` keyed by AST_VERSION and the
+    source's SHA-256, so an unchanged source is loaded without being
+    parsed. The source is read once, and the text that was hashed is the
+    text parsed on a miss; older cached ASTs are removed.
+    """
+    text = read_parsed_content(source)
+    key = hashlib.sha256(f'{AST_VERSION}\n{text}'.encode('utf-8')).hexdigest()
+    path = _course_cache_path(directory, key)
+    if not force:
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f), True
+        except (OSError, EOFError, AttributeError, TypeError, pickle.UnpicklingError):
+            pass
+
+    course = parse_course(io.StringIO(text))
+    _write_atomic(path, pickle.dumps(course, protocol=pickle.HIGHEST_PROTOCOL))
+    for name in os.listdir(directory):
+        if name.startswith('course-') and name.endswith('.ast') and os.path.join(directory, name) != path:
+            os.remove(os.path.join(directory, name))
+    return course, False
+
+def convert(source=source_path, output=output_path, directory=build_dir, force=False, chunks=chunks_path):
+    """
+    Regenerate `output` from `source`, re-rendering only changed modules.
+
+    The course AST comes from load_course, so an unchanged source is not
+    parsed at all, and every output below is generated from it. Every
+    module's rendered TypeScript is cached under `directory` keyed by the
+    hash of its source lines; unchanged modules are copied from the cache.
+    The output file is only rewritten when its bytes change, so an edit that
+    renders identically leaves its mtime (and the Next.js build cache)
+    alone. Per-module JSON chunks and their index go to `chunks`. Returns
+    {module number: [changed section ids]} for the modules that were
+    re-rendered, whether the output was written and whether the AST came
+    from the cache.
+    """
+    course, cached = load_course(source, directory, force)
+    manifest = load_manifest(directory)
+    chunk_dir = os.path.join(directory, 'modules')
+    os.makedirs(chunk_dir, exist_ok=True)
+
+    entries = {}
+    rendered = {}
+    records = []
+    parts = []
+    for module in course.modules:
+        number = str(module.number)
+        key = module_key(module)
+        chunk_path = os.path.join(chunk_dir, f'{key}.ts')
+        previous = manifest['modules'].get(number, {})
+        record = module_record(module)
+        records.append(record)
+
+        part = None
+        if not force and previous.get('key') == key:
+            try:
+                with open(chunk_path, 'rb') as f:
+                    part = f.read()
+            except OSError:
+                part = None
+        if part is None:
+            for problem in module.quiz_problems:
+                print(f"  ⚠ Module {number} quiz {problem}")
+            part = render_module(record).encode('utf-8')
+            _write_atomic(chunk_path, part)
+            old_sections = previous.get('sections', {})
+            rendered[module.number] = [
+                sid for sid, sha in module.section_sha256.items() if old_sections.get(sid) != sha
+            ]
+
+        parts.append(part)
+        entries[number] = {'sha256': module.sha256, 'key': key, 'sections': module.section_sha256}
+
+    data = MODULES_TS_HEADER.encode('utf-8') + b''.join(parts) + MODULES_TS_FOOTER.encode('utf-8')
+    written = write_if_changed(output, data)
+    if chunks:
+        emit_reference_table(records, chunks)
+        emit_module_chunks(records, chunks, rendered)
+        emit_quiz_bank(records, chunks)
+        emit_search_index(records, chunks)
+        emit_payloads(records, os.path.join(chunks, 'payloads'))
+
+    keep = {f"{entry['key']}.ts" for entry in entries.values()}
+    for name in os.listdir(chunk_dir):
+        if name not in keep:
+            os.remove(os.path.join(chunk_dir, name))
+
+    manifest = {'version': RENDER_VERSION, 'source': source, 'output': output, 'modules': entries}
+    _write_atomic(os.path.join(directory, 'manifest.json'),
+                  json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return rendered, written, cached
+
+def _report(output, rendered, written, cached, elapsed, forced=False):
+    source = 'cached AST' if cached else 'parsed'
+    if not rendered:
+        print(f"✓ {output}: no module changes ({source}, {elapsed * 1000:.0f} ms)")
+        return
+    for number, sections in sorted(rendered.items()):
+        if sections:
+            detail = f"{len(sections)} section(s) changed: {', '.join(sections)}"
+        else:
+            detail = 'forced' if forced else 'module metadata or layout changed'
+        print(f"  ↻ Module {number}: {detail}")
+    state = 'written' if written else 'unchanged'
+    print(f"✓ {output}: re-rendered {len(rendered)} module(s), output {state} ({source}, {elapsed * 1000:.0f} ms)")
+
+def watch(args, interval=0.2):
+    """Re-convert whenever the source file is saved"""
+    print(f"Watching {args.source} (Ctrl+C to stop)")
+    last = None
+    try:
+        while True:
+            try:
+                mtime = os.stat(args.source).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime is not None and mtime != last:
+                last = mtime
+                started = time.perf_counter()
+                try:
+                    rendered, written, cached = convert(args.source, args.output, args.build_dir, chunks=args.chunks_dir)
+                except Exception as e:
+                    print(f"✗ {type(e).__name__}: {e}", file=sys.stderr)
+                else:
+                    _report(args.output, rendered, written, cached, time.perf_counter() - started)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Convert the parsed course markdown to modules.ts.')
+    parser.add_argument('source', nargs='?', default=source_path)
+    parser.add_argument('--output', default=output_path, help=f'TypeScript output (default: {output_path})')
+    parser.add_argument('--build-dir', default=build_dir, help='manifest and per-module cache directory')
+    parser.add_argument('--chunks-dir', default=chunks_path,
+                        help=f'per-module JSON chunks and index (default: {chunks_path}; empty to skip)')
+    parser.add_argument('--force', action='store_true', help='re-parse the source and re-render every module')
+    parser.add_argument('--watch', action='store_true', help='re-convert on every save of the source')
+    parser.add_argument('--profile', nargs='?', const=True,
+                        help='report per-stage time and memory as JSON (to stderr, or to the given path)')
+    parser.add_argument('--summary', action='store_true', help='print a per-module summary and exit')
+    args = parser.parse_args(argv)
+    stage_profiler.enable(args.profile)
+
+    if args.summary:
+        course, _ = load_course(args.source, args.build_dir)
+        for module in course.modules:
+            tables = sum(isinstance(block, Table) for section in module.sections for block in section.blocks)
+            print(f"Module {module.number}: {len(module.sections)} sections, {tables} tables, "
+                  f"{len(module.quiz)} quiz questions, {len(module.references)} references")
+        return 0
+    if args.watch:
+        return watch(args)
+
+    started = time.perf_counter()
+    rendered, written, cached = convert(args.source, args.output, args.build_dir, args.force, args.chunks_dir)
+    _report(args.output, rendered, written, cached, time.perf_counter() - started, args.force)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
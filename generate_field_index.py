@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Generate the field -> widget object index used by the TypeScript PDF fillers.
+
+For every PDF field named in SCAT6_FIELD_MAP (scat6-field-mapping.ts) or
+addressed directly by the filler (scat6-pdf-fill.ts / scoat6-pdf-fill.ts),
+the index records the field's object number, its widget annotations, their
+appearance-state names and the page they sit on. The filler uses it to jump
+straight to the field objects instead of scanning the whole form.
+
+Every entry is validated against the real template, so a mapping that points
+at a missing field, a field of the wrong type, or a radio state the template
+does not have fails here instead of in a clinician's download.
+
+Usage:
+    python3 generate_field_index.py              # regenerate all forms
+    python3 generate_field_index.py --form scat6
+    python3 generate_field_index.py --check      # fail if an index is stale
+"""
+
+import json
+import os
+import re
+import sys
+
+from pdf_field_catalog import field_options, load_catalog
+from scat6_field_map import flatten_field_map, load_field_map
+import stage_profiler
+
+utils_dir = 'app/scat-forms/shared/utils'
+
+FORMS = {
+    'scat6': {
+        'template': 'public/docs/SCAT6_Fillable.pdf',
+        'mapping': (f'{utils_dir}/scat6-field-mapping.ts', 'SCAT6_FIELD_MAP'),
+        'filler': f'{utils_dir}/scat6-pdf-fill.ts',
+        'output': f'{utils_dir}/scat6-field-index.json',
+    },
+    'scoat6': {
+        'template': 'public/docs/SCOAT6_Fillable.pdf',
+        'mapping': None,
+        'filler': f'{utils_dir}/scoat6-pdf-fill.ts',
+        'output': f'{utils_dir}/scoat6-field-index.json',
+    },
+}
+
+# Radio flag (bit 16) of a /Btn field
+RADIO_FLAG = 1 << 15
+
+FILLER_CALL = re.compile(r"\b(set\w+)\(form, '([^']+)'(.*)")
+STATE_LITERAL = re.compile(r"'(/[^'$]+)'")
+
+
+def filler_calls(path):
+    """(helper, field name, state literals) for each set*(form, '...') call"""
+    calls = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = FILLER_CALL.search(line)
+            if match:
+                helper, name, rest = match.groups()
+                calls.append((helper, name, STATE_LITERAL.findall(rest)))
+    return calls
+
+
+def _expected(helper, states):
+    """What a filler helper needs from a field: (types, required states)"""
+    if helper.startswith('setTextField'):
+        return ('/Tx',), []
+    if helper == 'setSymptomRadio':
+        return ('/Btn',), [f'/{n}' for n in range(7)]
+    if helper.startswith('setRadioButton'):
+        return ('/Btn',), states
+    if helper.startswith('setCheckBox'):
+        return ('/Btn',), []
+    return None, []
+
+
+def _index_entry(entry):
+    widgets = [
+        {
+            'object': w['object'],
+            'generation': w['generation'],
+            'page': w['page'],
+            'states': w['states'],
+        }
+        for w in entry['widgets']
+    ]
+    return {
+        'object': entry['object'],
+        'generation': entry['generation'],
+        'type': entry['type'],
+        'flags': entry['flags'],
+        'page': entry['page'],
+        'richText': entry['rich_text'],
+        'states': field_options(entry),
+        'widgets': widgets,
+    }
+
+
+def build_index(form):
+    """Return (index, errors, warnings) for one form definition"""
+    errors = []
+    warnings = []
+    catalog = load_catalog(form['template'])
+    fields = catalog['fields']
+
+    keys = {}
+    if form['mapping']:
+        path, const = form['mapping']
+        for key, name in flatten_field_map(load_field_map(path, const)):
+            keys[key] = name
+
+    calls = filler_calls(form['filler'])
+    for _, name, _ in calls:
+        keys.setdefault(name, name)
+
+    wanted = sorted(set(keys.values()))
+    for name in wanted:
+        if name not in fields:
+            owners = ', '.join(key for key, target in keys.items() if target == name)
+            errors.append(f"{name}: not in template (used by {owners})")
+
+    for helper, name, states in calls:
+        entry = fields.get(name)
+        if entry is None:
+            continue
+        types, required = _expected(helper, states)
+        if types and entry['type'] not in types:
+            errors.append(f"{name}: {helper} expects {'/'.join(types)}, template has {entry['type']}")
+            continue
+        if helper == 'setSymptomRadio' and not entry['flags'] & RADIO_FLAG:
+            warnings.append(f"{name}: symptom scale is not a radio group")
+        options = field_options(entry) + ['/Off']
+        missing = [state for state in required if state not in options]
+        if missing:
+            errors.append(f"{name}: {helper} selects {', '.join(missing)}, template offers {', '.join(options)}")
+        if entry['type'] == '/Tx' and entry['rich_text']:
+            warnings.append(f"{name}: rich text field (not supported by pdf-lib)")
+
+    index = {
+        'template': form['template'],
+        'sha256': catalog['sha256'],
+        'fields': {name: _index_entry(fields[name]) for name in wanted if name in fields},
+        'keys': keys,
+    }
+    return index, errors, warnings
+
+
+def render(index):
+    """JSON with one line per field/key so diffs stay readable and the file small"""
+    def block(items):
+        rows = [f'    {json.dumps(k, ensure_ascii=False)}: {json.dumps(v, ensure_ascii=False, separators=(",", ":"))}'
+                for k, v in items.items()]
+        return '{\n' + ',\n'.join(rows) + '\n  }'
+
+    return (
+        '{\n'
+        f'  "template": {json.dumps(index["template"])},\n'
+        f'  "sha256": {json.dumps(index["sha256"])},\n'
+        f'  "fields": {block(index["fields"])},\n'
+        f'  "keys": {block(index["keys"])}\n'
+        '}\n'
+    )
+
+
+def main(argv):
+    stage_profiler.enable()
+    check = '--check' in argv
+    selected = list(FORMS)
+    if '--form' in argv:
+        selected = [argv[argv.index('--form') + 1]]
+    explicit = '--form' in argv
+
+    failed = False
+    for form_id in selected:
+        form = FORMS[form_id]
+        if not os.path.exists(form['template']):
+            message = f"⊘ {form_id}: template {form['template']} not found"
+            if explicit:
+                print(message, file=sys.stderr)
+                failed = True
+            else:
+                print(f"{message}; skipped")
+            continue
+
+        index, errors, warnings = build_index(form)
+        for warning in warnings:
+            print(f"  ⚠ {form_id} {warning}")
+        if errors:
+            failed = True
+            print(f"✗ {form_id}: {len(errors)} mapping error(s)", file=sys.stderr)
+            for error in errors:
+                print(f"  ✗ {error}", file=sys.stderr)
+            continue
+
+        content = render(index)
+        if check:
+            current = None
+            if os.path.exists(form['output']):
+                with open(form['output'], 'r', encoding='utf-8') as f:
+                    current = f.read()
+            if current != content:
+                failed = True
+                print(f"✗ {form['output']} is stale; run python3 generate_field_index.py", file=sys.stderr)
+            else:
+                print(f"✓ {form['output']} is up to date ({len(index['fields'])} fields)")
+            continue
+
+        with open(form['output'], 'w', encoding='utf-8') as f:
+            f.write(content)
+        print(f"✓ {form['output']}: {len(index['fields'])} fields, {len(index['keys'])} keys")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,72 +1,70 @@
 #!/usr/bin/env python3
-import PyPDF2
+from pdf_field_catalog import lookup_fields
+import stage_profiler
 
 pdf_path = 'public/docs/SCAT6_Fillable.pdf'
 
+stage_profiler.enable()
+
+
+def print_widget_options(field):
+    """Print the appearance-state options of each kid widget"""
+    for widget in field['widgets']:
+        if widget['states']:
+            print(f"    Options: {widget['states']}")
+
+
 try:
-    with open(pdf_path, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
-        if '/AcroForm' in reader.trailer['/Root']:
-            fields = reader.get_fields()
+    # Only the fields printed below are resolved; nothing else is walked
+    wanted = [f'ori{i}' for i in range(1, 6)] + ['Tri1a', 'Tri1b', 'Tri2a'] + [f'Check Box{i}' for i in range(1, 6)]
+    fields = lookup_fields(wanted, pdf_path)
+    if fields:
 
-            # Check orientation fields
-            print("\n=== ORIENTATION FIELDS (ori1-ori5) DETAILED ===\n")
-            for i in range(1, 6):
-                field_name = f'ori{i}'
-                if field_name in fields:
-                    field = fields[field_name]
-                    print(f"{field_name}:")
-                    print(f"  Type: {field.get('/FT')}")
+        # Check orientation fields
+        print("\n=== ORIENTATION FIELDS (ori1-ori5) DETAILED ===\n")
+        for i in range(1, 6):
+            field_name = f'ori{i}'
+            if field_name in fields:
+                field = fields[field_name]
+                print(f"{field_name}:")
+                print(f"  Type: {field['type']}")
 
-                    if '/Kids' in field:
-                        print(f"  Has Kids: {len(field['/Kids'])}")
-                        for j, kid in enumerate(field['/Kids']):
-                            kid_obj = kid.get_object()
-                            print(f"  Kid {j}:")
-                            if '/AP' in kid_obj and '/N' in kid_obj['/AP']:
-                                options = kid_obj['/AP']['/N'].get_object()
-                                if hasattr(options, 'keys'):
-                                    print(f"    Options: {list(options.keys())}")
-                            if '/AS' in kid_obj:
-                                print(f"    Appearance State: {kid_obj['/AS']}")
-                    print()
+                if field['has_kids']:
+                    print(f"  Has Kids: {len(field['widgets'])}")
+                    for j, kid in enumerate(field['widgets']):
+                        print(f"  Kid {j}:")
+                        if kid['states']:
+                            print(f"    Options: {kid['states']}")
+                        if kid['as'] is not None:
+                            print(f"    Appearance State: {kid['as']}")
+                print()
 
-            # Check immediate memory trial fields
-            print("\n=== IMMEDIATE MEMORY TRIAL FIELDS (Sample) ===\n")
-            for field_name in ['Tri1a', 'Tri1b', 'Tri2a']:
-                if field_name in fields:
-                    field = fields[field_name]
-                    print(f"{field_name}:")
-                    print(f"  Type: {field.get('/FT')}")
+        # Check immediate memory trial fields
+        print("\n=== IMMEDIATE MEMORY TRIAL FIELDS (Sample) ===\n")
+        for field_name in ['Tri1a', 'Tri1b', 'Tri2a']:
+            if field_name in fields:
+                field = fields[field_name]
+                print(f"{field_name}:")
+                print(f"  Type: {field['type']}")
 
-                    if '/Kids' in field:
-                        print(f"  Has Kids: {len(field['/Kids'])}")
-                        for j, kid in enumerate(field['/Kids']):
-                            kid_obj = kid.get_object()
-                            if '/AP' in kid_obj and '/N' in kid_obj['/AP']:
-                                options = kid_obj['/AP']['/N'].get_object()
-                                if hasattr(options, 'keys'):
-                                    print(f"    Options: {list(options.keys())}")
-                    print()
+                if field['has_kids']:
+                    print(f"  Has Kids: {len(field['widgets'])}")
+                    print_widget_options(field)
+                print()
 
-            # Check athlete background checkboxes
-            print("\n=== ATHLETE BACKGROUND CHECKBOXES ===\n")
-            for i in range(1, 6):
-                field_name = f'Check Box{i}'
-                if field_name in fields:
-                    field = fields[field_name]
-                    print(f"{field_name}:")
-                    print(f"  Type: {field.get('/FT')}")
+        # Check athlete background checkboxes
+        print("\n=== ATHLETE BACKGROUND CHECKBOXES ===\n")
+        for i in range(1, 6):
+            field_name = f'Check Box{i}'
+            if field_name in fields:
+                field = fields[field_name]
+                print(f"{field_name}:")
+                print(f"  Type: {field['type']}")
 
-                    if '/Kids' in field:
-                        print(f"  Has Kids: {len(field['/Kids'])}")
-                        for j, kid in enumerate(field['/Kids']):
-                            kid_obj = kid.get_object()
-                            if '/AP' in kid_obj and '/N' in kid_obj['/AP']:
-                                options = kid_obj['/AP']['/N'].get_object()
-                                if hasattr(options, 'keys'):
-                                    print(f"    Options: {list(options.keys())}")
-                    print()
+                if field['has_kids']:
+                    print(f"  Has Kids: {len(field['widgets'])}")
+                    print_widget_options(field)
+                print()
 
 except Exception as e:
     print(f"Error: {e}")
@@ -0,0 +1,137 @@
+// Download manifest for public/docs written by build_asset_manifest.py
+import fs from 'fs/promises'
+import path from 'path'
+import { etagMatches } from '@/lib/module-chunks'
+
+export interface AssetEntry {
+  path: string
+  size: number
+  mtimeNs: number
+  lastModified: string
+  sha256: string
+  etag: string
+  mimeType: string
+  // PDFs only
+  pages?: number
+  formFields?: number
+  linearized?: boolean
+}
+
+export interface ByteRange {
+  start: number
+  end: number
+}
+
+const DEFAULT_MANIFEST = 'data/generated/asset-manifest.json'
+
+// Loaded once per server instance; a missing manifest is retried on the next request
+let pending: Promise<Record<string, AssetEntry> | null> | null = null
+
+// Drop entries whose file was rewritten (or removed) after build_asset_manifest.py
+// ran, so those files are served directly instead of with a stale ETag or range
+async function dropStaleEntries(assets: Record<string, AssetEntry>): Promise<Record<string, AssetEntry>> {
+  const current: Record<string, AssetEntry> = {}
+  await Promise.all(
+    Object.entries(assets).map(async ([name, entry]) => {
+      if ('error' in entry) return
+      const stat = await fs.stat(path.join(process.cwd(), entry.path)).catch(() => null)
+      if (stat && stat.size === entry.size && Math.abs(stat.mtimeMs - entry.mtimeNs / 1e6) <= 1) {
+        current[name] = entry
+      } else {
+        console.warn(`[ASSET MANIFEST] ${name} changed since the manifest was built; run build_asset_manifest.py`)
+      }
+    })
+  )
+  return current
+}
+
+export function loadAssetManifest(): Promise<Record<string, AssetEntry> | null> {
+  if (!pending) {
+    const file = path.resolve(process.cwd(), process.env.ASSET_MANIFEST || DEFAULT_MANIFEST)
+    pending = fs
+      .readFile(file, 'utf-8')
+      .then((data) => dropStaleEntries(JSON.parse(data).assets as Record<string, AssetEntry>))
+      .catch((error) => {
+        if (error.code !== 'ENOENT') console.error('[ASSET MANIFEST] Could not load manifest:', error)
+        pending = null
+        return null
+      })
+  }
+  return pending
+}
+
+// Manifest entry for a file; null without a manifest or an entry, on a
+// describe error, or when the file no longer matched when the manifest loaded
+export async function getAsset(fileName: string): Promise<AssetEntry | null> {
+  const manifest = await loadAssetManifest()
+  return manifest?.[fileName] ?? null
+}
+
+// True when the client's copy (If-None-Match, else If-Modified-Since) is current
+export function notModified(
+  entry: AssetEntry,
+  ifNoneMatch: string | null,
+  ifModifiedSince: string | null
+): boolean {
+  if (ifNoneMatch) return etagMatches(ifNoneMatch, [entry.etag])
+  if (ifModifiedSince) {
+    const since = Date.parse(ifModifiedSince)
+    return !isNaN(since) && Date.parse(entry.lastModified) <= since
+  }
+  return false
+}
+
+/**
+ * Resolve a single-range `Range: bytes=...` header against the asset.
+ *
+ * Returns null to serve the whole file (no header, a multi-range or
+ * malformed header, or an If-Range that no longer matches) and 'unsatisfiable'
+ * when the range lies outside the file.
+ */
+export function resolveRange(
+  entry: AssetEntry,
+  range: string | null,
+  ifRange: string | null
+): ByteRange | 'unsatisfiable' | null {
+  if (!range) return null
+  if (ifRange && ifRange.trim() !== entry.etag && ifRange.trim() !== entry.lastModified) return null
+
+  const match = /^bytes=(\d*)-(\d*)$/.exec(range.trim())
+  if (!match || (!match[1] && !match[2])) return null
+
+  const size = entry.size
+  if (!match[1]) {
+    // Suffix range: the last N bytes
+    const length = parseInt(match[2], 10)
+    if (length === 0) return 'unsatisfiable'
+    return { start: Math.max(0, size - length), end: size - 1 }
+  }
+  const start = parseInt(match[1], 10)
+  const end = match[2] ? Math.min(parseInt(match[2], 10), size - 1) : size - 1
+  if (start >= size || end < start) return 'unsatisfiable'
+  return { start, end }
+}
+
+// Read [start, end] of an asset without loading the rest of the file
+export async function readAssetRange(entry: AssetEntry, { start, end }: ByteRange): Promise<Buffer> {
+  const handle = await fs.open(path.join(process.cwd(), entry.path), 'r')
+  try {
+    const buffer = Buffer.alloc(end - start + 1)
+    const { bytesRead } = await handle.read(buffer, 0, buffer.length, start)
+    return buffer.subarray(0, bytesRead)
+  } finally {
+    await handle.close()
+  }
+}
+
+// Response headers shared by 200, 206 and HEAD responses
+export function assetHeaders(entry: AssetEntry, fileName: string): Record<string, string> {
+  return {
+    'Content-Type': entry.mimeType,
+    'Content-Disposition': `attachment; filename="${fileName}"`,
+    'Cache-Control': 'private, max-age=3600',
+    ETag: entry.etag,
+    'Last-Modified': entry.lastModified,
+    'Accept-Ranges': 'bytes',
+  }
+}
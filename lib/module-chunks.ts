@@ -0,0 +1,290 @@
+// Per-module course content chunks written by convert_modules.py
+import fs from 'fs/promises'
+import path from 'path'
+import type { Module } from '@/data/modules'
+
+export interface ModuleIndexEntry {
+  id: number
+  title: string
+  subtitle: string
+  duration: string
+  points: number
+  description: string
+  videoRequiredMinutes: number
+  sectionIds: string[]
+}
+
+interface ModuleIndex {
+  modules: ModuleIndexEntry[]
+  previewSections: number
+}
+
+export type ModuleVariant = 'full' | 'preview'
+
+interface EncodedPayload {
+  file: string
+  etag: string
+  size: number
+}
+
+interface PayloadEntry extends EncodedPayload {
+  encodings: Record<string, EncodedPayload>
+}
+
+export interface ModulePayload {
+  body: Buffer
+  etag: string
+  encoding: string | null
+  // Every ETag this payload is known by (identity and encoded variants)
+  etags: string[]
+}
+
+// Chunks are opt-in: set MODULE_CHUNKS_DIR (e.g. data/generated/modules) to
+// serve modules from the converter output instead of data/modules.ts
+function chunksDir(): string | null {
+  const dir = process.env.MODULE_CHUNKS_DIR
+  return dir ? path.resolve(process.cwd(), dir) : null
+}
+
+// Parsed chunks and payload bytes stay cached for the life of the server instance
+const cache = new Map<string, Promise<unknown | null>>()
+const bytesCache = new Map<string, Promise<Buffer | null>>()
+
+function readChunk<T>(name: string): Promise<T | null> {
+  const dir = chunksDir()
+  if (!dir) return Promise.resolve(null)
+
+  const file = path.join(dir, name)
+  let pending = cache.get(file)
+  if (!pending) {
+    pending = fs
+      .readFile(file, 'utf-8')
+      .then((data) => JSON.parse(data))
+      .catch((error) => {
+        console.error(`[MODULE CHUNKS] Could not load ${name}:`, error)
+        cache.delete(file)
+        return null
+      })
+    cache.set(file, pending)
+  }
+  return pending as Promise<T | null>
+}
+
+export interface ReferenceTable {
+  // reference id -> citation
+  references: Record<string, string>
+  // module id (or 'teaser') -> reference ids
+  modules: Record<string, string[]>
+}
+
+type ModuleChunk = Omit<Module, 'clinicalReferences'> & { clinicalReferenceIds: string[] }
+
+// The course-wide, deduplicated citation table (references.json)
+export function loadReferenceTable(): Promise<ReferenceTable | null> {
+  return readChunk<ReferenceTable>('references.json')
+}
+
+// Load one module (full or first-sections preview) with its citations resolved
+// from the reference table; null when chunks are disabled or missing
+export async function loadModuleChunk(id: number, variant: ModuleVariant = 'full'): Promise<Module | null> {
+  if (!Number.isInteger(id) || id < 1) return null
+  const suffix = variant === 'preview' ? '.preview' : ''
+  const [chunk, table] = await Promise.all([
+    readChunk<ModuleChunk>(`module-${id}${suffix}.json`),
+    loadReferenceTable(),
+  ])
+  if (!chunk || !table) return null
+
+  const { clinicalReferenceIds, ...module } = chunk
+  return {
+    ...module,
+    clinicalReferences: clinicalReferenceIds
+      .map((refId) => table.references[refId])
+      .filter((citation): citation is string => Boolean(citation)),
+  }
+}
+
+// Module list metadata without any section content
+export async function loadModuleIndex(): Promise<ModuleIndexEntry[] | null> {
+  const index = await readChunk<ModuleIndex>('index.json')
+  return index ? index.modules : null
+}
+
+function readBytes(file: string): Promise<Buffer | null> {
+  let pending = bytesCache.get(file)
+  if (!pending) {
+    pending = fs.readFile(file).catch((error) => {
+      console.error(`[MODULE CHUNKS] Could not load ${path.basename(file)}:`, error)
+      bytesCache.delete(file)
+      return null
+    })
+    bytesCache.set(file, pending)
+  }
+  return pending
+}
+
+// Preferred content-coding accepted by the client, among those available
+function pickEncoding(acceptEncoding: string | null, available: string[]): string | null {
+  if (!acceptEncoding) return null
+  const accepted = new Map<string, number>()
+  for (const part of acceptEncoding.split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';')
+    const q = params.map((p) => p.trim()).find((p) => p.startsWith('q='))
+    accepted.set(name.trim(), q ? parseFloat(q.slice(2)) || 0 : 1)
+  }
+  for (const encoding of ['br', 'gzip']) {
+    if (!available.includes(encoding)) continue
+    const q = accepted.get(encoding) ?? accepted.get('*') ?? 0
+    if (q > 0) return encoding
+  }
+  return null
+}
+
+// True when an If-None-Match header matches any of the payload's ETags
+export function etagMatches(ifNoneMatch: string | null, etags: string[]): boolean {
+  if (!ifNoneMatch) return false
+  if (ifNoneMatch.trim() === '*') return true
+  return ifNoneMatch
+    .split(',')
+    .map((tag) => tag.trim().replace(/^W\//, ''))
+    .some((tag) => etags.includes(tag))
+}
+
+// Pre-rendered API response body for a module, pre-compressed when the client
+// accepts it; null when chunks are disabled or the payload is missing
+export async function loadModulePayload(
+  id: number,
+  variant: ModuleVariant,
+  accessLevel: string,
+  acceptEncoding: string | null
+): Promise<ModulePayload | null> {
+  const dir = chunksDir()
+  if (!dir || !Number.isInteger(id) || id < 1) return null
+
+  const manifest = await readChunk<{ payloads: Record<string, PayloadEntry> }>('payloads/payloads.json')
+  const entry = manifest?.payloads[`module-${id}-${variant}-${accessLevel}`]
+  if (!entry) return null
+
+  const etags = [entry.etag, ...Object.values(entry.encodings).map((encoded) => encoded.etag)]
+  const encoding = pickEncoding(acceptEncoding, Object.keys(entry.encodings))
+  const chosen = encoding ? entry.encodings[encoding] : entry
+  const body = await readBytes(path.join(dir, 'payloads', chosen.file))
+  if (!body) return null
+
+  return { body, etag: chosen.etag, encoding, etags }
+}
+
+interface QuizBankQuestion {
+  question: string
+  options: string[]
+  correctAnswer: number
+}
+
+export interface QuizGrade {
+  correct: number
+  total: number
+  // question id -> whether the submitted answer was right
+  results: Record<string, boolean>
+}
+
+// Grade a quiz submission ({question id: option index}) against quiz-bank.json;
+// null when chunks are disabled or the module has no quiz in the bank
+export async function gradeQuiz(moduleId: number, answers: Record<string, number>): Promise<QuizGrade | null> {
+  const bank = await readChunk<{ modules: Record<string, Record<string, QuizBankQuestion>> }>('quiz-bank.json')
+  const questions = bank?.modules[String(moduleId)]
+  if (!questions || Object.keys(questions).length === 0) return null
+
+  const results: Record<string, boolean> = {}
+  for (const [id, question] of Object.entries(questions)) {
+    results[id] = answers[id] === question.correctAnswer
+  }
+  const correct = Object.values(results).filter(Boolean).length
+  return { correct, total: Object.keys(questions).length, results }
+}
+
+export interface SearchDoc {
+  module: number
+  section: string
+  kind: 'section' | 'quiz' | 'reference'
+  title: string
+  snippet: string
+}
+
+export interface SearchHit extends SearchDoc {
+  score: number
+}
+
+interface SearchIndex {
+  version: number
+  docs: SearchDoc[]
+  // term -> [[doc, position, ...], ...]
+  terms: Record<string, number[][]>
+}
+
+// Must match SEARCH_TOKEN, STOPWORDS and STEM_SUFFIXES in convert_modules.py
+const STOPWORDS = new Set(
+  'a an and are as at be by for from has have in is it its of on or that the their this to was were which with'.split(' ')
+)
+const STEM_SUFFIXES: [string, string][] = [
+  ['ies', 'y'], ['ied', 'y'], ['sses', 'ss'], ['ing', ''], ['ed', ''], ['ly', ''], ['es', ''], ['s', ''],
+]
+
+function stem(word: string): string {
+  for (const [suffix, replacement] of STEM_SUFFIXES) {
+    if (word.endsWith(suffix) && word.length - suffix.length + replacement.length >= 3) {
+      if (suffix === 's' && (word.endsWith('ss') || word.endsWith('us') || word.endsWith('is'))) {
+        return word
+      }
+      return word.slice(0, -suffix.length) + replacement
+    }
+  }
+  return word
+}
+
+function searchTerms(text: string): string[] {
+  return (text.toLowerCase().match(/[a-z0-9]+/g) ?? [])
+    .filter((token) => !STOPWORDS.has(token))
+    .map(stem)
+}
+
+// Ranked course search over search-index.json (tf-idf, with a boost for
+// documents containing every term and for terms appearing as a phrase);
+// null when chunks are disabled
+export async function searchCourse(query: string, limit = 10): Promise<SearchHit[] | null> {
+  const index = await readChunk<SearchIndex>('search-index.json')
+  if (!index) return null
+
+  const terms = Array.from(new Set(searchTerms(query)))
+  if (terms.length === 0) return []
+
+  const scores = new Map<number, number>()
+  const matched = new Map<number, number>()
+  const positions = new Map<number, number[][]>()
+  terms.forEach((term, i) => {
+    const postings = index.terms[term] ?? []
+    if (postings.length === 0) return
+    const idf = Math.log(1 + index.docs.length / postings.length)
+    for (const [doc, ...found] of postings) {
+      scores.set(doc, (scores.get(doc) ?? 0) + found.length * idf)
+      matched.set(doc, (matched.get(doc) ?? 0) + 1)
+      const perTerm = positions.get(doc) ?? []
+      perTerm[i] = found
+      positions.set(doc, perTerm)
+    }
+  })
+
+  const hits: SearchHit[] = []
+  for (const [doc, score] of scores) {
+    let total = score
+    if (matched.get(doc) === terms.length) {
+      total *= 2
+      const perTerm = positions.get(doc) ?? []
+      const phrase = terms.length > 1 && perTerm[0].some((start) =>
+        perTerm.every((found, offset) => found.includes(start + offset))
+      )
+      if (phrase) total *= 2
+    }
+    hits.push({ ...index.docs[doc], score: total })
+  }
+  return hits.sort((a, b) => b.score - a.score).slice(0, limit)
+}
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Linearized ("fast web view") copies of PDFs.
+
+A linearized PDF starts with a linearization dictionary, the document
+catalog, the objects of the first page and a hint stream, so a viewer that
+fetches with HTTP byte-range requests can render page one from the first
+part of the file and fetch later pages on demand instead of waiting for the
+whole 3.6 MB SCAT6 template.
+
+The hint tables have to describe the final byte layout exactly, so writing
+them is left to qpdf: the pikepdf bindings when they are installed, the qpdf
+command-line tool otherwise. With neither available, linearize() raises
+LinearizationUnavailable naming what to install.
+
+Linearizing renumbers objects, so the field indexes must be regenerated
+(python3 generate_field_index.py) after linearizing a template in place,
+and the download manifest (python3 build_asset_manifest.py) after
+rewriting anything in public/docs.
+Appending an incremental update (scat6_batch_fill.py --incremental) undoes
+linearization, which is why the two are not combined.
+
+Usage:
+    python3 linearize_pdf.py input.pdf [output.pdf]    # in place without output
+    python3 linearize_pdf.py --check file.pdf [...]    # report which files are linearized
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+docs_dir = 'public/docs'
+
+# The linearization dictionary must be the first object in the file
+FIRST_OBJECT = re.compile(rb'\d+\s+\d+\s+obj\s*<<(.*?)>>', re.S)
+LENGTH_ENTRY = re.compile(rb'/L\s+(\d+)')
+
+
+class LinearizationUnavailable(RuntimeError):
+    """Neither pikepdf nor the qpdf command-line tool is installed"""
+
+
+def backend():
+    """'pikepdf', 'qpdf' or None"""
+    if pikepdf is not None:
+        return 'pikepdf'
+    if shutil.which('qpdf'):
+        return 'qpdf'
+    return None
+
+
+def require_backend():
+    name = backend()
+    if name is None:
+        raise LinearizationUnavailable(
+            'linearizing needs qpdf: pip install pikepdf, or install the qpdf '
+            'command-line tool (apt install qpdf / brew install qpdf)'
+        )
+    return name
+
+
+def linearize(source, target):
+    """Write a linearized copy of `source` to `target` (which may be the same path)"""
+    name = require_backend()
+    temporary = f'{target}.linearized.tmp'
+    try:
+        if name == 'pikepdf':
+            with pikepdf.open(source) as pdf:
+                pdf.save(temporary, linearize=True, object_stream_mode=pikepdf.ObjectStreamMode.preserve)
+        else:
+            result = subprocess.run(
+                ['qpdf', '--linearize', '--object-streams=preserve', source, temporary],
+                capture_output=True, text=True,
+            )
+            # Exit status 3 means the file was written with warnings
+            if result.returncode not in (0, 3):
+                raise ValueError(f'{source}: qpdf failed: {result.stderr.strip()}')
+        os.replace(temporary, target)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def is_linearized(path):
+    """True when the file starts with a linearization dictionary that still covers the whole file"""
+    with open(path, 'rb') as f:
+        head = f.read(2048)
+    match = FIRST_OBJECT.search(head)
+    if not match or b'/Linearized' not in match.group(1):
+        return False
+    length = LENGTH_ENTRY.search(match.group(1))
+    # /L no longer matching means an incremental update was appended
+    return bool(length) and int(length.group(1)) == os.path.getsize(path)
+
+
+def main(argv):
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__.strip())
+        return 0 if argv else 1
+
+    if argv[0] == '--check':
+        missing = 0
+        for path in argv[1:]:
+            if is_linearized(path):
+                print(f"✓ {path}: linearized")
+            else:
+                missing += 1
+                print(f"✗ {path}: not linearized")
+        return 1 if missing else 0
+
+    source = argv[0]
+    target = argv[1] if len(argv) > 1 else source
+    try:
+        linearize(source, target)
+    except LinearizationUnavailable as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 2
+    before = os.path.getsize(source) if target != source else None
+    after = os.path.getsize(target)
+    print(f"✓ {target}: linearized ({after:,} bytes{f', from {before:,}' if before else ''})")
+    if target == source:
+        print("Object numbers changed; run python3 generate_field_index.py if this is a form template")
+    if os.path.abspath(os.path.dirname(target)) == os.path.abspath(docs_dir):
+        print("public/docs changed; run python3 build_asset_manifest.py to refresh the download manifest")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Rewrite the PDFs in public/docs as smaller files for download.
+
+Each PDF is parsed once with PyPDF2 and written back at the object level
+(the same approach as pdf_form_writer.py):
+
+- only objects reachable from the trailer's /Root and /Info are kept, so
+  orphaned objects and superseded revisions are dropped;
+- byte-identical streams (font programs, images, form XObjects) and font,
+  font descriptor, encoding and graphics-state dictionaries are stored once;
+- streams without a filter are Flate-compressed when that makes them smaller;
+- every other object is packed into compressed object streams and the
+  cross-reference table is written as a compressed xref stream.
+
+The rewritten file must have the same page count and every AcroForm field
+of the original (type, flags, value, default, appearance states, widget
+pages) or it is rejected and the original is left alone.
+
+With --linearize the results are also linearized for fast web view (needs
+pikepdf or the qpdf tool; see linearize_pdf.py).
+
+Usage:
+    python3 optimize_pdfs.py                 # optimised copies in .optimized-docs/
+    python3 optimize_pdfs.py --in-place      # replace the public/docs files that shrink
+    python3 optimize_pdfs.py --in-place --linearize
+    python3 optimize_pdfs.py public/docs/SCAT6_Fillable.pdf
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import os
+import struct
+import sys
+import zlib
+from collections import deque
+
+import PyPDF2
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+)
+
+from linearize_pdf import LinearizationUnavailable, is_linearized, linearize, require_backend
+from pdf_field_catalog import build_catalog, field_options, load_catalog
+from pdf_form_writer import serialize_object
+import stage_profiler
+from stage_profiler import profiled
+
+docs_dir = 'public/docs'
+output_dir = '.optimized-docs'
+
+# Non-stream objects per compressed object stream
+OBJECTS_PER_STREAM = 100
+
+# Dictionaries that can be shared when two copies are identical
+SHARED_TYPES = ('/Font', '/FontDescriptor', '/Encoding', '/ExtGState')
+
+
+def _references(obj):
+    """Indirect references inside an object, without following them"""
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, IndirectObject):
+            yield item
+        elif isinstance(item, dict):
+            for key, value in item.items():
+                # Stream lengths are recomputed on write
+                if key == '/Length' and isinstance(item, StreamObject):
+                    continue
+                stack.append(value)
+        elif isinstance(item, list):
+            stack.extend(item)
+
+
+def _trailer_roots(reader):
+    return [(key, reader.trailer.raw_get(key)) for key in ('/Root', '/Info', '/ID') if key in reader.trailer]
+
+
+def reachable_objects(reader, number=None, objects=None):
+    """
+    Object numbers reachable from the trailer, breadth-first, and their objects.
+
+    Given the objects of an earlier walk, references are followed through
+    `number` (duplicate -> shared object) within those instead of the file.
+    """
+    found = {}
+    order = []
+    queue = deque()
+    for _, value in _trailer_roots(reader):
+        queue.extend([value] if isinstance(value, IndirectObject) else _references(value))
+
+    while queue:
+        ref = queue.popleft()
+        idnum = number(ref.idnum) if number else ref.idnum
+        if idnum in found:
+            continue
+        obj = objects[idnum] if objects is not None else reader.get_object(ref)
+        found[idnum] = NullObject() if obj is None else obj
+        order.append(idnum)
+        queue.extend(_references(found[idnum]))
+    return order, found
+
+
+def _rewrite(obj, number):
+    """Copy of an object with every reference renumbered (generation 0)"""
+    if isinstance(obj, IndirectObject):
+        return IndirectObject(number(obj.idnum), 0, None)
+    if isinstance(obj, StreamObject):
+        copy = obj.__class__()
+        copy._data = obj._data
+        for key, value in obj.items():
+            if key != '/Length':
+                copy[NameObject(key)] = _rewrite(value, number)
+        return copy
+    if isinstance(obj, DictionaryObject):
+        copy = DictionaryObject()
+        for key, value in obj.items():
+            copy[NameObject(key)] = _rewrite(value, number)
+        return copy
+    if isinstance(obj, ArrayObject):
+        return ArrayObject(_rewrite(value, number) for value in obj)
+    return obj
+
+
+def _shareable(obj):
+    if isinstance(obj, StreamObject):
+        return obj.get('/Type') not in ('/XRef', '/ObjStm')
+    return isinstance(obj, DictionaryObject) and obj.get('/Type') in SHARED_TYPES
+
+
+def deduplicate(order, objects):
+    """Map each duplicate object number to the first identical object"""
+    canonical = {}
+    number = lambda idnum: canonical.get(idnum, idnum)
+    while True:
+        seen = {}
+        merged = 0
+        for idnum in order:
+            obj = objects[idnum]
+            if idnum in canonical or not _shareable(obj):
+                continue
+            buf = io.BytesIO()
+            _rewrite(obj, number).write_to_stream(buf, None)
+            first = seen.setdefault(hashlib.sha256(buf.getvalue()).digest(), idnum)
+            if first != idnum:
+                canonical[idnum] = first
+                merged += 1
+        # Merging children can make their parents identical too
+        if not merged:
+            return canonical
+
+
+def _compressed(stream):
+    """Flate-compress an unfiltered stream when that saves space"""
+    if not isinstance(stream, DecodedStreamObject) or not stream._data:
+        return stream
+    data = zlib.compress(stream._data, 9)
+    if len(data) + len(b'/Filter /FlateDecode ') >= len(stream._data):
+        return stream
+    encoded = EncodedStreamObject()
+    encoded.update(stream)
+    encoded[NameObject('/Filter')] = NameObject('/FlateDecode')
+    encoded._data = data
+    return encoded
+
+
+def _object_stream(members):
+    """A compressed /ObjStm holding [(object number, object), ...]"""
+    header = []
+    body = io.BytesIO()
+    for idnum, obj in members:
+        header.append(f'{idnum} {body.tell()}')
+        obj.write_to_stream(body, None)
+        body.write(b'\n')
+    head = (' '.join(header) + '\n').encode('ascii')
+
+    stream = EncodedStreamObject()
+    stream[NameObject('/Type')] = NameObject('/ObjStm')
+    stream[NameObject('/N')] = NumberObject(len(members))
+    stream[NameObject('/First')] = NumberObject(len(head))
+    stream[NameObject('/Filter')] = NameObject('/FlateDecode')
+    stream._data = zlib.compress(head + body.getvalue(), 9)
+    return stream
+
+
+@profiled
+def write_optimized(reader, stream):
+    """Write a garbage-collected, deduplicated, object-stream PDF of reader's document"""
+    order, objects = reachable_objects(reader)
+    canonical = deduplicate(order, objects)
+    kept, _ = reachable_objects(reader, lambda idnum: canonical.get(idnum, idnum), objects)
+
+    numbers = {idnum: new for new, idnum in enumerate(kept, 1)}
+    number = lambda idnum: numbers.get(canonical.get(idnum, idnum), 0)
+    rewritten = [(numbers[idnum], _rewrite(objects[idnum], number)) for idnum in kept]
+
+    start = stream.tell()
+    # Object and xref streams need PDF 1.5
+    header = max(reader.pdf_header, '%PDF-1.5')
+    stream.write(header.encode('ascii') + b'\n%\xe2\xe3\xcf\xd3\n')
+    entries = {0: (0, 0, 65535)}
+    packed = []
+    for idnum, obj in rewritten:
+        if isinstance(obj, StreamObject):
+            entries[idnum] = (1, stream.tell() - start, 0)
+            stream.write(serialize_object(idnum, 0, _compressed(obj)))
+        else:
+            packed.append((idnum, obj))
+
+    next_id = len(kept) + 1
+    for first in range(0, len(packed), OBJECTS_PER_STREAM):
+        members = packed[first:first + OBJECTS_PER_STREAM]
+        for index, (idnum, _) in enumerate(members):
+            entries[idnum] = (2, next_id, index)
+        entries[next_id] = (1, stream.tell() - start, 0)
+        stream.write(serialize_object(next_id, 0, _object_stream(members)))
+        next_id += 1
+
+    xref_id = next_id
+    entries[xref_id] = (1, stream.tell() - start, 0)
+    xref = EncodedStreamObject()
+    xref[NameObject('/Type')] = NameObject('/XRef')
+    xref[NameObject('/Size')] = NumberObject(xref_id + 1)
+    xref[NameObject('/W')] = ArrayObject(NumberObject(n) for n in (1, 4, 2))
+    xref[NameObject('/Filter')] = NameObject('/FlateDecode')
+    for key, value in _trailer_roots(reader):
+        xref[NameObject(key)] = _rewrite(value, number)
+    xref._data = zlib.compress(b''.join(struct.pack('>BIH', *entries[idnum]) for idnum in range(xref_id + 1)), 9)
+    stream.write(serialize_object(xref_id, 0, xref))
+    stream.write(f'\nstartxref\n{entries[xref_id][1]}\n%%EOF\n'.encode('ascii'))
+    return {'objects': len(order), 'kept': len(kept), 'shared': len(canonical)}
+
+
+def _field_signature(catalog):
+    """What must survive the rewrite for every field (object numbers may change)"""
+    return {
+        name: (
+            entry['type'], entry['flags'], entry['max_len'], entry['rich_text'],
+            repr(entry['value']), repr(entry['default']), field_options(entry),
+            [(w['page'], w['states'], w['as']) for w in entry['widgets']],
+        )
+        for name, entry in catalog['fields'].items()
+    }
+
+
+def verify(source, optimized):
+    """Problems that would make the optimised file unsafe to ship"""
+    before = load_catalog(source)
+    after = build_catalog(optimized)
+    problems = []
+    if after['pages'] != before['pages']:
+        problems.append(f"page count {before['pages']} -> {after['pages']}")
+    expected = _field_signature(before)
+    actual = _field_signature(after)
+    for name in sorted(expected):
+        if name not in actual:
+            problems.append(f"{name}: field missing")
+        elif actual[name] != expected[name]:
+            problems.append(f"{name}: field changed")
+    return problems
+
+
+def optimize(source, target):
+    """Rewrite one PDF; returns (before bytes, after bytes, stats, problems)"""
+    reader = PyPDF2.PdfReader(source)
+    if reader.is_encrypted:
+        return os.path.getsize(source), None, None, ['encrypted; not rewritten']
+
+    temporary = f'{target}.tmp'
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    try:
+        with open(temporary, 'wb') as f:
+            stats = write_optimized(reader, f)
+        problems = verify(source, temporary)
+        size = os.path.getsize(temporary)
+        if not problems and size < os.path.getsize(source):
+            os.replace(temporary, target)
+        return os.path.getsize(source), size, stats, problems
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Size-optimise the PDFs in public/docs.')
+    parser.add_argument('paths', nargs='*', help=f'PDFs to optimise (default: {docs_dir}/*.pdf)')
+    parser.add_argument('--output-dir', default=output_dir, help='where optimised copies are written')
+    parser.add_argument('--in-place', action='store_true', help='replace the originals that shrink')
+    parser.add_argument('--linearize', action='store_true', help='linearize the results for fast web view')
+    parser.add_argument('--profile', nargs='?', const=True,
+                        help='report per-stage time and memory as JSON (to stderr, or to the given path)')
+    args = parser.parse_args(argv)
+    stage_profiler.enable(args.profile)
+
+    if args.linearize:
+        try:
+            require_backend()
+        except LinearizationUnavailable as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 2
+
+    paths = args.paths or sorted(glob.glob(os.path.join(docs_dir, '*.pdf')))
+    failed = False
+    replaced = False
+    total_before = total_after = 0
+    for path in paths:
+        target = path if args.in_place else os.path.join(args.output_dir, os.path.basename(path))
+        before, after, stats, problems = optimize(path, target)
+        name = os.path.basename(path)
+        if problems:
+            failed = True
+            print(f"✗ {name}: {len(problems)} problem(s); left unchanged", file=sys.stderr)
+            for problem in problems[:10]:
+                print(f"  ✗ {problem}", file=sys.stderr)
+            total_before += before
+            total_after += before
+            continue
+
+        written = min(before, after)
+        if args.linearize:
+            linearize(target if after < before else path, target)
+            written = os.path.getsize(target)
+        total_before += before
+        total_after += written
+        replaced = replaced or (args.in_place and (after < before or args.linearize))
+        note = '' if after < before else '  (no gain; kept original)'
+        if args.linearize:
+            note += f'; linearized: {written:,} bytes'
+        elif is_linearized(path) and after < before:
+            note += '  (source was linearized; add --linearize to keep fast web view)'
+        print(f"✓ {name}: {before:,} -> {after:,} bytes ({(after - before) / before:+.1%}), "
+              f"{stats['kept']}/{stats['objects']} objects, {stats['shared']} shared{note}")
+
+    if total_before:
+        print(f"Total: {total_before:,} -> {total_after:,} bytes ({(total_after - total_before) / total_before:+.1%})")
+    if replaced:
+        print("Object numbers changed; run python3 generate_field_index.py to refresh the field indexes")
+        print("public/docs changed; run python3 build_asset_manifest.py to refresh the download manifest")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Persistent AcroForm field catalog for the fillable PDFs in public/docs.
+
+Parsing SCAT6_Fillable.pdf with PyPDF2 and walking every field, kid widget
+and appearance dictionary takes the better part of a second. The catalog does
+that walk once, stores a compact JSON index keyed by the PDF's SHA-256, and
+lets the inspector scripts answer their questions from the cached index.
+
+Usage:
+    python3 pdf_field_catalog.py [pdf_path] [--rebuild] [--json]
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+from pdf_field_resolver import FieldResolver, ResolvedField, appearance_states, iter_fields
+import stage_profiler
+from stage_profiler import profiled, stage
+
+pdf_path = 'public/docs/SCAT6_Fillable.pdf'
+cache_dir = '.field-catalog'
+
+# Bump when the catalog entry format changes so stale caches are rebuilt
+CATALOG_VERSION = 2
+
+# Field flag bit 26 (1-based) marks a rich text field
+RICH_TEXT_FLAG = 1 << 25
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _pdf_value(value):
+    """Convert a PDF object to a JSON-friendly value"""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return [_pdf_value(v) for v in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    return str(value)
+
+
+class _PageLocator:
+    """Resolves widget annotations to 1-based page numbers"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._page_numbers = None
+        self._annotation_pages = None
+
+    def page_of(self, obj_num, widget):
+        """Page of a widget, via /P or (lazily) the pages' /Annots arrays"""
+        if '/P' in widget:
+            if self._page_numbers is None:
+                self._page_numbers = {}
+                for index, page in enumerate(self.reader.pages, 1):
+                    self._page_numbers[page.indirect_ref.idnum] = index
+            page_ref = widget.raw_get('/P')
+            if hasattr(page_ref, 'idnum') and page_ref.idnum in self._page_numbers:
+                return self._page_numbers[page_ref.idnum]
+        if obj_num is None:
+            return None
+        if self._annotation_pages is None:
+            self._annotation_pages = {}
+            for index, page in enumerate(self.reader.pages, 1):
+                for annot in page.get('/Annots', None) or []:
+                    if hasattr(annot, 'idnum'):
+                        self._annotation_pages[annot.idnum] = index
+        return self._annotation_pages.get(obj_num)
+
+
+def _widget_entry(ref, widget, pages):
+    """Describe one widget annotation: object, page, appearance states"""
+    obj_num = ref.idnum if ref is not None else None
+    return {
+        'object': obj_num,
+        'generation': ref.generation if ref is not None else None,
+        'page': pages.page_of(obj_num, widget),
+        'states': appearance_states(widget),
+        'as': _pdf_value(widget.get('/AS')),
+    }
+
+
+def _field_entry(field, pages):
+    """Build the catalog entry for a resolved terminal field"""
+    flags = int(field.get('/Ff', 0))
+    widgets = [_widget_entry(ref, widget, pages) for ref, widget in field.widgets]
+
+    return {
+        'name': field.name,
+        'type': _pdf_value(field.get('/FT')),
+        'flags': flags,
+        'max_len': _pdf_value(field.get('/MaxLen')),
+        'rich_text': '/RV' in field.field or bool(flags & RICH_TEXT_FLAG),
+        'value': _pdf_value(field.get('/V')),
+        'default': _pdf_value(field.get('/DV')),
+        'object': field.object_number,
+        'generation': getattr(field.ref, 'generation', None),
+        'has_kids': field.has_kids,
+        'widgets': widgets,
+        'page': next((w['page'] for w in widgets if w['page']), None),
+    }
+
+
+@profiled
+def build_catalog(path=pdf_path, sha256=None):
+    """Parse a PDF once and return its field catalog"""
+    import PyPDF2
+
+    with stage('PdfReader'):
+        reader = PyPDF2.PdfReader(path)
+    catalog = {
+        'version': CATALOG_VERSION,
+        'source': path,
+        'sha256': sha256 or file_sha256(path),
+        'pages': len(reader.pages),
+        'has_acroform': '/AcroForm' in reader.trailer['/Root'],
+        'fields': {},
+    }
+    if not catalog['has_acroform']:
+        return catalog
+
+    acroform = reader.trailer['/Root']['/AcroForm']
+    pages = _PageLocator(reader)
+    with stage('catalog_fields'):
+        for name, ref, field, inherited in iter_fields(acroform.get('/Fields', [])):
+            catalog['fields'][name] = _field_entry(ResolvedField(name, ref, field, inherited), pages)
+    return catalog
+
+
+def cache_path_for(sha256, directory=cache_dir):
+    """Location of the cached catalog for a given content hash"""
+    return os.path.join(directory, f'{sha256}.json')
+
+
+@profiled
+def load_catalog(path=pdf_path, directory=cache_dir, rebuild=False):
+    """Return the catalog for a PDF, building and caching it on a miss"""
+    sha256 = file_sha256(path)
+    cached = cache_path_for(sha256, directory)
+
+    if not rebuild and os.path.exists(cached):
+        with open(cached, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        if catalog.get('version') == CATALOG_VERSION:
+            return catalog
+
+    catalog = build_catalog(path, sha256)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{cached}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, separators=(',', ':'))
+    os.replace(tmp_path, cached)
+    return catalog
+
+
+@profiled
+def lookup_fields(names, path=pdf_path, directory=cache_dir):
+    """
+    Catalog entries for just the named fields.
+
+    Served from the cached catalog when one exists for this exact file;
+    otherwise the lazy resolver walks only as much of the form as needed to
+    find the names, and no full catalog is built.
+    """
+    sha256 = file_sha256(path)
+    cached = cache_path_for(sha256, directory)
+    if os.path.exists(cached):
+        with open(cached, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        if catalog.get('version') == CATALOG_VERSION:
+            return {name: catalog['fields'][name] for name in names if name in catalog['fields']}
+
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    if '/AcroForm' not in reader.trailer['/Root']:
+        return {}
+    pages = _PageLocator(reader)
+    found = FieldResolver(reader).resolve(names)
+    return {name: _field_entry(found[name], pages) for name in names if name in found}
+
+
+def field_options(entry):
+    """Union of the widgets' on-states (everything except /Off)"""
+    options = []
+    for widget in entry['widgets']:
+        for state in widget['states']:
+            if state != '/Off' and state not in options:
+                options.append(state)
+    return options
+
+
+def fields_of_type(catalog, field_type):
+    """Catalog entries with the given /FT, e.g. '/Tx' or '/Btn'"""
+    return {name: entry for name, entry in catalog['fields'].items() if entry['type'] == field_type}
+
+
+def main(argv):
+    stage_profiler.enable()
+    path = pdf_path
+    rebuild = '--rebuild' in argv
+    as_json = '--json' in argv
+    positional = [arg for arg in argv if not arg.startswith('--')]
+    if positional:
+        path = positional[0]
+
+    catalog = load_catalog(path, rebuild=rebuild)
+    if as_json:
+        json.dump(catalog, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"Catalog for {path}")
+    print(f"  SHA-256: {catalog['sha256']}")
+    print(f"  Pages:   {catalog['pages']}")
+    print(f"  Fields:  {len(catalog['fields'])}")
+    print(f"  Cache:   {cache_path_for(catalog['sha256'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Lazy by-name resolver over an AcroForm field tree.
+
+reader.get_fields() materialises every field (and every inherited attribute)
+in the form before a single name can be looked up. The resolver instead walks
+/AcroForm /Fields on demand: it reads each field's /T, only descends into
+/Kids whose name is a prefix of something that was asked for, and stops as
+soon as every requested name has been found. Kid widgets and /AP streams are
+only dereferenced when a caller actually touches them.
+
+Usage:
+    python3 pdf_field_resolver.py [--pdf path] name [name ...]
+"""
+
+import sys
+
+import stage_profiler
+from stage_profiler import profiled
+
+pdf_path = 'public/docs/SCAT6_Fillable.pdf'
+
+# Attributes a terminal field inherits from its ancestors
+INHERITABLE = ('/FT', '/Ff', '/V', '/DV', '/MaxLen')
+
+
+def iter_fields(refs, parent_name='', inherited=None):
+    """
+    Yield (name, ref, field, inherited) for every terminal field, depth-first.
+
+    A field whose /Kids carry their own /T is a non-terminal node; its
+    inheritable attributes are pushed down to the children.
+    """
+    inherited = inherited or {}
+    for ref in refs:
+        field = ref.get_object()
+        partial = field.get('/T')
+        name = parent_name
+        if partial is not None:
+            name = f'{parent_name}.{partial}' if parent_name else str(partial)
+
+        kids = field.get('/Kids')
+        if kids is not None and any('/T' in kid.get_object() for kid in kids):
+            yield from iter_fields(kids, name, _push_scope(inherited, field))
+        elif name:
+            yield name, ref, field, inherited
+
+
+def _push_scope(inherited, field):
+    """Inheritable attributes visible to the children of a field"""
+    scope = dict(inherited)
+    for key in INHERITABLE:
+        if key in field:
+            scope[key] = field[key]
+    return scope
+
+
+class ResolvedField:
+    """A field found by the resolver; kids and appearances load on access"""
+
+    __slots__ = ('name', 'ref', 'field', 'inherited', '_widgets')
+
+    def __init__(self, name, ref, field, inherited):
+        self.name = name
+        self.ref = ref
+        self.field = field
+        self.inherited = inherited
+        self._widgets = None
+
+    def get(self, key, default=None):
+        """Field attribute, falling back to inherited values"""
+        if key in self.field:
+            return self.field[key]
+        return self.inherited.get(key, default)
+
+    @property
+    def object_number(self):
+        return self.ref.idnum if hasattr(self.ref, 'idnum') else None
+
+    @property
+    def has_kids(self):
+        return '/Kids' in self.field
+
+    @property
+    def widgets(self):
+        """(ref, widget dict) pairs; the field itself when it is its own widget"""
+        if self._widgets is None:
+            kids = self.field.get('/Kids')
+            if kids is not None:
+                self._widgets = [(kid, kid.get_object()) for kid in kids]
+            elif self.field.get('/Subtype') == '/Widget':
+                self._widgets = [(self.ref, self.field)]
+            else:
+                self._widgets = []
+        return self._widgets
+
+
+def appearance_states(widget):
+    """Names of a widget's normal appearance states, e.g. ['/1', '/Off']"""
+    if '/AP' not in widget or '/N' not in widget['/AP']:
+        return []
+    normal = widget['/AP']['/N'].get_object()
+    # Push buttons carry a single appearance stream, not a state dictionary
+    if hasattr(normal, 'keys') and not hasattr(normal, 'get_data'):
+        return [str(state) for state in normal.keys()]
+    return []
+
+
+class FieldResolver:
+    """
+    Resolves fully-qualified field names against a PdfReader (or a writer's
+    root) without walking more of the field tree than needed.
+
+    Results are memoised, so repeated lookups on the same resolver are free,
+    and names that were never found are reported as missing rather than
+    raising.
+    """
+
+    def __init__(self, reader=None, root=None):
+        if root is None:
+            root = reader.trailer['/Root']
+        acroform = root.get('/AcroForm')
+        self._fields = acroform.get_object().get('/Fields', []) if acroform is not None else []
+        self._found = {}
+        self._exhausted = set()
+
+    @profiled
+    def resolve(self, names):
+        """Return {name: ResolvedField} for the requested names that exist"""
+        wanted = [name for name in names if name not in self._found and name not in self._exhausted]
+        if wanted:
+            self._search(self._fields, '', {}, set(wanted))
+            self._exhausted.update(name for name in wanted if name not in self._found)
+        return {name: self._found[name] for name in names if name in self._found}
+
+    def get(self, name):
+        """Single-field convenience wrapper around resolve()"""
+        return self.resolve([name]).get(name)
+
+    def _search(self, refs, parent_name, inherited, remaining):
+        """Walk one level of the tree, descending only towards wanted names"""
+        for ref in refs:
+            if not remaining:
+                return
+            field = ref.get_object()
+            partial = field.get('/T')
+            if partial is None:
+                continue
+            name = f'{parent_name}.{partial}' if parent_name else str(partial)
+
+            if name in remaining:
+                self._found[name] = ResolvedField(name, ref, field, inherited)
+                remaining.discard(name)
+                continue
+
+            prefix = f'{name}.'
+            if '/Kids' in field and any(wanted.startswith(prefix) for wanted in remaining):
+                self._search(field['/Kids'], name, _push_scope(inherited, field), remaining)
+
+
+def main(argv):
+    import PyPDF2
+
+    stage_profiler.enable()
+    path = pdf_path
+    if argv[:1] == ['--pdf'] and len(argv) > 1:
+        path, argv = argv[1], argv[2:]
+    if not argv:
+        print(__doc__.strip())
+        return 1
+
+    resolver = FieldResolver(PyPDF2.PdfReader(path))
+    found = resolver.resolve(argv)
+    for name in argv:
+        field = found.get(name)
+        if field is None:
+            print(f"{name}: not found")
+            continue
+        print(f"{name}: {field.get('/FT', 'Unknown')} (object {field.object_number})")
+        for ref, widget in field.widgets:
+            states = appearance_states(widget)
+            if states:
+                print(f"  {getattr(ref, 'idnum', '?')}: {states}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Fill AcroForm fields of a pre-parsed PDF template.
+
+PyPDF2's PdfWriter drops the /AcroForm when cloning a document, so filled
+copies are written here at the object level instead: the template is parsed
+once, every unchanged object is serialised once and reused, and for each
+document only the field and widget dictionaries whose values change are
+re-serialised before a fresh xref table is written.
+
+write_incremental() goes further and never re-serialises the template at
+all: the original bytes are copied verbatim from a memory map and a PDF
+incremental-update section holding only the changed objects is appended.
+"""
+
+import io
+import mmap
+import struct
+import zlib
+
+import PyPDF2
+from PyPDF2.generic import (
+    BooleanObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    TextStringObject,
+)
+
+from pdf_field_resolver import FieldResolver, appearance_states
+from stage_profiler import profiled, stage
+
+# Object types that only make sense in the template's own file layout
+SKIPPED_TYPES = ('/XRef', '/ObjStm')
+
+
+def serialize_object(idnum, generation, obj):
+    """Bytes of an indirect object definition: `n g obj ... endobj`"""
+    buf = io.BytesIO()
+    buf.write(f'{idnum} {generation} obj\n'.encode('ascii'))
+    obj.write_to_stream(buf, None)
+    buf.write(b'\nendobj\n')
+    return buf.getvalue()
+
+
+def button_state(states, value):
+    """
+    Pick the appearance state a checkbox/radio value selects, or None.
+
+    Booleans prefer /1 and /0 (the SCAT6 convention) and fall back to
+    /Yes*, /No* or the widget's only on-state; numbers select /<n>; strings
+    match a state name exactly or by its prefix ('Yes' -> '/Yes_3').
+    """
+    on_states = [s for s in states if s != '/Off']
+    if isinstance(value, bool):
+        wanted = '/1' if value else '/0'
+        if wanted in on_states:
+            return wanted
+        prefix = '/Yes' if value else '/No'
+        match = next((s for s in on_states if s.startswith(prefix)), None)
+        if match:
+            return match
+        if not value:
+            return '/Off'
+        return on_states[0] if len(on_states) == 1 else None
+
+    text = str(value)
+    if isinstance(value, float) and value.is_integer():
+        text = str(int(value))
+    name = text if text.startswith('/') else f'/{text}'
+    if name in states:
+        return name
+    return next((s for s in on_states if s.split('_')[0] == name), None)
+
+
+class FieldUpdate:
+    """Objects changed by filling a set of fields, keyed by object number"""
+
+    __slots__ = ('objects', 'filled', 'skipped')
+
+    def __init__(self):
+        self.objects = {}
+        self.filled = 0
+        self.skipped = []
+
+    def edit(self, ref, obj):
+        """Copy-on-write access to an object that is about to change"""
+        entry = self.objects.get(ref.idnum)
+        if entry is None:
+            copy = DictionaryObject()
+            copy.update(obj)
+            entry = self.objects[ref.idnum] = (ref.generation, copy)
+        return entry[1]
+
+
+class TemplateForm:
+    """A fillable PDF parsed once and filled many times"""
+
+    def __init__(self, path):
+        self.path = path
+        with stage('PdfReader'):
+            self.reader = PyPDF2.PdfReader(path)
+        if self.reader.is_encrypted:
+            raise ValueError(f'{path} is encrypted; fill an unencrypted template')
+        self.resolver = FieldResolver(self.reader)
+        self.root_ref = self.reader.trailer.raw_get('/Root')
+        self._serialized = {}
+        self._objects = None
+        self._mapped = None
+        self._startxref = None
+
+    @property
+    def header(self):
+        return self.reader.pdf_header.encode('ascii')
+
+    def object_ids(self):
+        """(idnum, generation) of every in-use object, in number order"""
+        if self._objects is None:
+            ids = {}
+            for generation, entries in self.reader.xref.items():
+                for idnum in entries:
+                    ids[idnum] = generation
+            for idnum in self.reader.xref_objStm:
+                ids.setdefault(idnum, 0)
+            self._objects = sorted(ids.items())
+        return self._objects
+
+    def template_object_bytes(self, idnum, generation):
+        """Serialised template object, or None for objects not carried over"""
+        key = (idnum, generation)
+        if key not in self._serialized:
+            obj = self.reader.get_object(IndirectObject(idnum, generation, self.reader))
+            data = None
+            if obj is not None:
+                kind = obj.get('/Type') if isinstance(obj, dict) else None
+                linearized = isinstance(obj, dict) and '/Linearized' in obj
+                if kind not in SKIPPED_TYPES and not linearized:
+                    data = serialize_object(idnum, generation, obj)
+            self._serialized[key] = data
+        return self._serialized[key]
+
+    @profiled
+    def fill(self, values):
+        """Return the FieldUpdate for {field name: value}"""
+        update = FieldUpdate()
+        resolved = self.resolver.resolve(list(values))
+        text_filled = False
+
+        for name, value in values.items():
+            field = resolved.get(name)
+            if field is None:
+                update.skipped.append((name, 'field not found'))
+                continue
+
+            if field.get('/FT') == '/Btn':
+                widgets = [(ref, widget, appearance_states(widget)) for ref, widget in field.widgets]
+                states = sorted({s for _, _, widget_states in widgets for s in widget_states})
+                state = button_state(states, value)
+                if state is None:
+                    update.skipped.append((name, f'no appearance state for {value!r}'))
+                    continue
+                update.edit(field.ref, field.field)[NameObject('/V')] = NameObject(state)
+                for ref, widget, widget_states in widgets:
+                    shown = state if state in widget_states else '/Off'
+                    update.edit(ref, widget)[NameObject('/AS')] = NameObject(shown)
+            else:
+                if isinstance(value, bool):
+                    value = 'Yes' if value else 'No'
+                update.edit(field.ref, field.field)[NameObject('/V')] = TextStringObject(str(value))
+                text_filled = True
+            update.filled += 1
+
+        if text_filled:
+            self._need_appearances(update)
+        return update
+
+    def _need_appearances(self, update):
+        """Ask viewers to regenerate text appearances (no fonts are embedded here)"""
+        root = self.root_ref.get_object()
+        acroform_ref = root.raw_get('/AcroForm')
+        if isinstance(acroform_ref, IndirectObject):
+            acroform = update.edit(acroform_ref, acroform_ref.get_object())
+        else:
+            acroform = DictionaryObject()
+            acroform.update(acroform_ref)
+            update.edit(self.root_ref, root)[NameObject('/AcroForm')] = acroform
+        acroform[NameObject('/NeedAppearances')] = BooleanObject(True)
+
+    def _trailer(self, size):
+        trailer = DictionaryObject()
+        trailer[NameObject('/Size')] = NumberObject(size)
+        for key in ('/Root', '/Info', '/ID'):
+            if key in self.reader.trailer:
+                trailer[NameObject(key)] = self.reader.trailer.raw_get(key)
+        return trailer
+
+    @profiled
+    def write_full(self, stream, update):
+        """Write a complete, standalone PDF with the update applied"""
+        start = stream.tell()
+        stream.write(self.header + b'\n%\xe2\xe3\xcf\xd3\n')
+
+        offsets = {}
+        for idnum, generation in self.object_ids():
+            if idnum in update.objects:
+                generation, obj = update.objects[idnum]
+                data = serialize_object(idnum, generation, obj)
+            else:
+                data = self.template_object_bytes(idnum, generation)
+            if data is None:
+                continue
+            offsets[idnum] = (stream.tell() - start, generation)
+            stream.write(data)
+
+        size = max(offsets) + 1 if offsets else 1
+        xref_offset = stream.tell() - start
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for idnum in range(1, size):
+            if idnum in offsets:
+                offset, generation = offsets[idnum]
+                lines.append(f'{offset:010d} {generation:05d} n \n')
+            else:
+                lines.append('0000000000 65535 f \n')
+        stream.write(''.join(lines).encode('ascii'))
+
+        stream.write(b'trailer\n')
+        self._trailer(size).write_to_stream(stream, None)
+        stream.write(f'\nstartxref\n{xref_offset}\n%%EOF\n'.encode('ascii'))
+
+    def _template_bytes(self):
+        """Read-only memory map of the template file"""
+        if self._mapped is None:
+            with open(self.path, 'rb') as f:
+                self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            tail_start = max(0, len(self._mapped) - 1024)
+            marker = self._mapped.rfind(b'startxref', tail_start)
+            if marker < 0:
+                raise ValueError(f'{self.path}: startxref not found')
+            self._startxref = int(self._mapped[marker + 9:marker + 40].split()[0])
+        return self._mapped
+
+    def _uses_xref_streams(self):
+        """True when the template's last cross-reference section is a stream"""
+        mapped = self._template_bytes()
+        return mapped[self._startxref:self._startxref + 4] != b'xref'
+
+    @profiled
+    def write_incremental(self, stream, update):
+        """
+        Write the template verbatim followed by an incremental update.
+
+        Per-document work is proportional to the number of changed objects:
+        only those are serialised, plus a cross-reference section for them
+        (a stream if the template uses xref streams, a table otherwise).
+        """
+        mapped = self._template_bytes()
+        start = stream.tell()
+        stream.write(mapped)
+        if mapped[-1:] not in (b'\n', b'\r'):
+            stream.write(b'\n')
+
+        offsets = {}
+        for idnum in sorted(update.objects):
+            generation, obj = update.objects[idnum]
+            offsets[idnum] = (stream.tell() - start, generation)
+            stream.write(serialize_object(idnum, generation, obj))
+
+        ids = [idnum for idnum, _ in self.object_ids()]
+        size = max(ids + list(offsets)) + 1 if (ids or offsets) else 1
+        trailer = self._trailer(size)
+        trailer[NameObject('/Prev')] = NumberObject(self._startxref)
+
+        if self._uses_xref_streams():
+            xref_offset = self._write_xref_stream(stream, start, offsets, size, trailer)
+        else:
+            xref_offset = stream.tell() - start
+            stream.write(b'xref\n')
+            for first, run in _contiguous(sorted(offsets)):
+                stream.write(f'{first} {len(run)}\n'.encode('ascii'))
+                for idnum in run:
+                    offset, generation = offsets[idnum]
+                    stream.write(f'{offset:010d} {generation:05d} n \n'.encode('ascii'))
+            stream.write(b'trailer\n')
+            trailer.write_to_stream(stream, None)
+
+        stream.write(f'\nstartxref\n{xref_offset}\n%%EOF\n'.encode('ascii'))
+
+    def _write_xref_stream(self, stream, start, offsets, size, trailer):
+        """Append a compressed /XRef stream object covering `offsets`"""
+        xref_id = size
+        xref_offset = stream.tell() - start
+        offsets = dict(offsets)
+        offsets[xref_id] = (xref_offset, 0)
+
+        index = []
+        rows = []
+        for first, run in _contiguous(sorted(offsets)):
+            index.extend((first, len(run)))
+            for idnum in run:
+                offset, generation = offsets[idnum]
+                rows.append(struct.pack('>BIH', 1, offset, generation))
+        data = zlib.compress(b''.join(rows))
+
+        trailer[NameObject('/Size')] = NumberObject(xref_id + 1)
+        header = (
+            f'{xref_id} 0 obj\n<< /Type /XRef /W [1 4 2] /Filter /FlateDecode'
+            f' /Index [{" ".join(str(n) for n in index)}] /Length {len(data)}'
+        ).encode('ascii')
+        stream.write(header)
+        for key, value in trailer.items():
+            stream.write(b' ' + key.encode('ascii') + b' ')
+            value.write_to_stream(stream, None)
+        stream.write(b' >>\nstream\n' + data + b'\nendstream\nendobj')
+        return xref_offset
+
+
+def _contiguous(numbers):
+    """Split sorted object numbers into (first, run) subsections"""
+    run = []
+    for number in numbers:
+        if run and number != run[-1] + 1:
+            yield run[0], run
+            run = []
+        run.append(number)
+    if run:
+        yield run[0], run
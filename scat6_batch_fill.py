@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Bulk SCAT6 report filler.
+
+Reads exported assessment records (JSON Lines or CSV), maps each one through
+SCAT6_FIELD_MAP (read from scat6-field-mapping.ts) and writes one filled copy
+of public/docs/SCAT6_Fillable.pdf per record.
+
+Each worker process parses the template once and reuses it for every record
+it fills. Records are streamed from the input and only a bounded number are
+in flight at a time, so memory stays flat regardless of the export size.
+
+With --incremental each output is the template's bytes copied verbatim plus
+an appended incremental update holding only the changed field and widget
+objects, so per-document cost tracks the number of filled fields rather than
+the size of the template.
+
+With --linearize each output is rewritten as a linearized ("fast web view")
+PDF so viewers can show page one before the whole report has downloaded
+(needs pikepdf or the qpdf tool; see linearize_pdf.py).
+
+Besides the mapped fields, the fields scat6-pdf-fill.ts sets outside
+SCAT6_FIELD_MAP (Sex/Sex_V2, athelete1-7, Foot and the dual-task times
+Text54-56, Text81, Text83A) are filled with the same values, so a batch
+report sets the same fields as the browser export of the same record.
+A record that cannot be read is reported and counted as failed; the rest of
+the batch still runs.
+
+Records use the SCAT6FormData shape. In CSV exports nested values use dotted
+column names: symptoms.headaches, immediateMemoryTrial1.0,
+decisionDates.date1 and so on.
+
+Usage:
+    python3 scat6_batch_fill.py assessments.jsonl out_dir [--workers N]
+        [--template PATH] [--format jsonl|csv] [--name-field idNumber]
+        [--incremental | --linearize]
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from linearize_pdf import LinearizationUnavailable, linearize, require_backend
+from pdf_form_writer import TemplateForm
+from scat6_field_map import load_field_map, mapping_path, record_to_field_values, unmapped_field_values
+import stage_profiler
+
+template_path = 'public/docs/SCAT6_Fillable.pdf'
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def _coerce(text):
+    """CSV cell -> bool/int/str, mirroring the JSON export's types"""
+    lowered = text.strip().lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    if re.fullmatch(r'-?\d+', text.strip()):
+        return int(text)
+    return text
+
+
+def unflatten(row):
+    """Turn dotted CSV columns into nested dicts; numeric segments become list items"""
+    record = {}
+    for column, cell in row.items():
+        if column is None or cell is None:
+            continue
+        parts = column.split('.')
+        node = record
+        for part, following in zip(parts, parts[1:]):
+            if following.isdigit():
+                node = node.setdefault(part, [])
+            elif isinstance(node, list):
+                index = int(part)
+                node.extend({} for _ in range(index + 1 - len(node)))
+                node = node[index]
+            else:
+                node = node.setdefault(part, {})
+        leaf = parts[-1]
+        value = _coerce(cell) if cell != '' else None
+        if isinstance(node, list):
+            index = int(leaf)
+            node.extend(None for _ in range(index + 1 - len(node)))
+            node[index] = value
+        else:
+            node[leaf] = value
+    return record
+
+
+def iter_records(path, fmt=None):
+    """Yield (record, None) per input record, or (None, error) for one that cannot be read"""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                try:
+                    yield unflatten(row), None
+                except (ValueError, TypeError) as e:
+                    yield None, f'{type(e).__name__}: {e}'
+        else:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield None, f'line {number}: {e}'
+                    continue
+                if isinstance(record, dict):
+                    yield record, None
+                else:
+                    yield None, f'line {number}: expected a JSON object'
+
+
+def read_records(path, fmt=None):
+    """Yield assessment records one at a time; ValueError on one that cannot be read"""
+    for record, error in iter_records(path, fmt):
+        if error:
+            raise ValueError(error)
+        yield record
+
+
+def output_name(record, index, name_field):
+    """File name for a filled report"""
+    stem = f'scat6-{index:06d}'
+    if name_field and record.get(name_field):
+        slug = re.sub(r'[^A-Za-z0-9._-]+', '-', str(record[name_field])).strip('-.')
+        if slug:
+            stem = f'{stem}-{slug}'
+    return f'{stem}.pdf'
+
+
+def _init_worker(template, mapping, out_dir, incremental, linearized):
+    _worker['form'] = TemplateForm(template)
+    _worker['field_map'] = load_field_map(mapping)
+    _worker['out_dir'] = out_dir
+    _worker['incremental'] = incremental
+    _worker['linearized'] = linearized
+
+
+def fill_record(form, field_map, record, path, incremental=False, linearized=False):
+    """Fill one record into `path`; returns the FieldUpdate"""
+    values = record_to_field_values(record, field_map)
+    values.update(unmapped_field_values(record))
+    update = form.fill(values)
+    tmp_path = f'{path}.tmp'
+    try:
+        with open(tmp_path, 'wb') as out:
+            if incremental:
+                form.write_incremental(out, update)
+            else:
+                form.write_full(out, update)
+        if linearized:
+            linearize(tmp_path, path)
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return update
+
+
+def _fill_task(index, record, name):
+    """Worker entry point; errors are returned, never raised"""
+    path = os.path.join(_worker['out_dir'], name)
+    try:
+        update = fill_record(_worker['form'], _worker['field_map'], record, path,
+                             _worker['incremental'], _worker['linearized'])
+        return index, name, update.filled, update.skipped, None
+    except Exception as e:
+        return index, name, 0, [], f'{type(e).__name__}: {e}'
+
+
+def run(args):
+    if args.linearize:
+        try:
+            require_backend()
+        except LinearizationUnavailable as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 2
+    os.makedirs(args.out_dir, exist_ok=True)
+    workers = args.workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+
+    done = failed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(args.template, args.mapping or mapping_path, args.out_dir, args.incremental, args.linearize),
+    ) as pool:
+        pending = set()
+
+        def drain(block_until):
+            nonlocal done, failed, pending
+            finished, pending = wait(pending, return_when=block_until)
+            for future in finished:
+                index, name, filled, skipped, error = future.result()
+                if error:
+                    failed += 1
+                    print(f"✗ record {index} ({name}): {error}", file=sys.stderr)
+                    continue
+                done += 1
+                if args.verbose:
+                    print(f"✓ {name}: {filled} fields")
+                    for field, reason in skipped:
+                        print(f"  ⊘ {field}: {reason}")
+
+        for index, (record, error) in enumerate(iter_records(args.input, args.format), 1):
+            if error:
+                failed += 1
+                print(f"✗ record {index}: {error}", file=sys.stderr)
+                continue
+            name = output_name(record, index, args.name_field)
+            pending.add(pool.submit(_fill_task, index, record, name))
+            if len(pending) >= max_in_flight:
+                drain(FIRST_COMPLETED)
+        while pending:
+            drain(FIRST_COMPLETED)
+
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"Filled {done} documents ({failed} failed) in {elapsed:.2f}s — {rate:.1f} docs/sec")
+    return 1 if failed else 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Fill SCAT6 PDFs in bulk from exported assessments.')
+    parser.add_argument('input', help='JSON Lines or CSV file of SCAT6FormData records')
+    parser.add_argument('out_dir', help='directory for the filled PDFs')
+    parser.add_argument('--template', default=template_path)
+    parser.add_argument('--mapping', help='scat6-field-mapping.ts to read SCAT6_FIELD_MAP from')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), help='input format (default: by extension)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--name-field', help='record field appended to output file names, e.g. idNumber')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--incremental', action='store_true',
+                      help='append an incremental update to the untouched template bytes')
+    mode.add_argument('--linearize', action='store_true',
+                      help='write linearized ("fast web view") PDFs')
+    parser.add_argument('-v', '--verbose', action='store_true', help='list each document and skipped fields')
+    args = parser.parse_args(argv)
+    stage_profiler.enable()
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Bulk extraction of filled values from completed SCAT6 PDFs.
+
+The reverse of scat6_batch_fill.py: every field named in SCAT6_FIELD_MAP
+(scat6-field-mapping.ts) is read back from each returned SCAT6_Fillable.pdf
+and written as one row per document. Text fields give their /V; checkboxes
+and radio groups give the on-state shown by their widgets' /AS (falling back
+to the field's /V), without the leading slash: symptoms.headaches '3',
+orientationMonth '1', an unticked box ''.
+
+Each worker process memory-maps its input, parses it with PyPDF2 and
+resolves only the mapped fields with FieldResolver, so the rest of the form
+is never walked. Files are streamed to the pool with a bounded number in
+flight and rows are written as results arrive. A file that cannot be read
+produces a row with its error instead of stopping the run.
+
+Columns are the dotted SCAT6_FIELD_MAP keys (symptoms.headaches,
+immediateMemoryTrial1.0, ...). Output format follows the extension: .csv,
+.jsonl, or .parquet when pyarrow is installed.
+
+Usage:
+    python3 scat6_extract.py returned_pdfs/ extracted.csv [--workers N]
+    python3 scat6_extract.py a.pdf b.pdf extracted.jsonl
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from pdf_field_catalog import load_catalog
+from pdf_field_resolver import FieldResolver
+from scat6_field_map import flatten_field_map, load_field_map, mapping_path
+import stage_profiler
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+template_path = 'public/docs/SCAT6_Fillable.pdf'
+
+# Rows buffered per Parquet row group
+PARQUET_BATCH = 1000
+
+# Per-worker state, set up once by _init_worker
+_worker = {}
+
+
+def mapped_fields(mapping=mapping_path, template=template_path):
+    """(dotted key, pdf field name) for every mapped field the template has"""
+    fields = load_catalog(template)['fields']
+    pairs = list(flatten_field_map(load_field_map(mapping)))
+    missing = [name for _, name in pairs if name not in fields]
+    return [(key, name) for key, name in pairs if name in fields], missing
+
+
+def _state(name):
+    text = str(name)
+    return '' if text == '/Off' else text.lstrip('/')
+
+
+def field_value(field):
+    """Text of a text field, or the on-state of a button field ('' when unset)"""
+    value = field.get('/V')
+    if field.get('/FT') != '/Btn':
+        return '' if value is None else str(value)
+    for _, widget in field.widgets:
+        shown = widget.get('/AS')
+        if shown is not None and shown != '/Off':
+            return _state(shown)
+    return '' if value is None else _state(value)
+
+
+def extract_values(path, fields):
+    """{dotted key: value} for one filled PDF"""
+    import PyPDF2
+
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        reader = PyPDF2.PdfReader(mapped)
+        if reader.is_encrypted:
+            raise ValueError('encrypted')
+        resolved = FieldResolver(reader).resolve([name for _, name in fields])
+        return {key: field_value(resolved[name]) if name in resolved else '' for key, name in fields}
+    finally:
+        mapped.close()
+
+
+def _init_worker(fields):
+    _worker['fields'] = fields
+
+
+def _extract_task(path):
+    """Worker entry point; errors are returned, never raised"""
+    try:
+        return path, extract_values(path, _worker['fields']), None
+    except Exception as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+
+def iter_inputs(paths):
+    """PDF paths, expanding directories recursively in sorted order"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith('.pdf'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+class RowWriter:
+    """Streams rows of {column: str} to CSV, JSON Lines or Parquet"""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = ['file', 'error', *columns]
+        self.format = os.path.splitext(path)[1].lower().lstrip('.')
+        if self.format == 'parquet' and pyarrow is None:
+            raise SystemExit('Parquet output needs pyarrow (pip install pyarrow); use .csv or .jsonl')
+        if self.format not in ('csv', 'jsonl', 'parquet'):
+            raise SystemExit(f'{path}: output must end in .csv, .jsonl or .parquet')
+
+        self._pending = []
+        self._parquet = None
+        self._file = None
+        if self.format != 'parquet':
+            self._file = open(path, 'w', encoding='utf-8', newline='')
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=self.columns)
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self.format == 'csv':
+            self._csv.writerow(row)
+        elif self.format == 'jsonl':
+            self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+        else:
+            self._pending.append(row)
+            if len(self._pending) >= PARQUET_BATCH:
+                self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        table = pyarrow.table({column: [row.get(column, '') for row in self._pending] for column in self.columns})
+        if self._parquet is None:
+            self._parquet = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table)
+        self._pending = []
+
+    def close(self):
+        if self.format == 'parquet':
+            self._flush()
+            if self._parquet is not None:
+                self._parquet.close()
+        else:
+            self._file.close()
+
+
+def run(args):
+    fields, missing = mapped_fields(args.mapping or mapping_path, args.template)
+    for name in missing:
+        print(f"  ⚠ {name}: mapped but not in {args.template}; skipped", file=sys.stderr)
+
+    workers = args.workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    writer = RowWriter(args.output, [key for key, _ in fields])
+
+    done = failed = 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(fields,)) as pool:
+            pending = set()
+
+            def drain(block_until):
+                nonlocal done, failed, pending
+                finished, pending = wait(pending, return_when=block_until)
+                for future in finished:
+                    path, values, error = future.result()
+                    if error:
+                        failed += 1
+                        print(f"✗ {path}: {error}", file=sys.stderr)
+                        writer.write({'file': path, 'error': error})
+                        continue
+                    done += 1
+                    writer.write({'file': path, 'error': '', **values})
+
+            for path in iter_inputs(args.inputs):
+                pending.add(pool.submit(_extract_task, path))
+                if len(pending) >= max_in_flight:
+                    drain(FIRST_COMPLETED)
+            while pending:
+                drain(FIRST_COMPLETED)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"Extracted {done} documents ({failed} failed) in {elapsed:.2f}s — {rate:.1f} docs/sec → {args.output}")
+    return 1 if failed else 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Extract mapped field values from filled SCAT6 PDFs.')
+    parser.add_argument('inputs', nargs='+', help='filled PDFs or directories of them')
+    parser.add_argument('output', help='.csv, .jsonl or .parquet file to write')
+    parser.add_argument('--template', default=template_path, help='blank template the fields are checked against')
+    parser.add_argument('--mapping', help='scat6-field-mapping.ts to read SCAT6_FIELD_MAP from')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+    stage_profiler.enable()
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+SCAT6_FIELD_MAP for the Python PDF tooling.
+
+The field mapping is maintained in
+app/scat-forms/shared/utils/scat6-field-mapping.ts; this module reads the
+object literal straight out of that file so the Python tools always use the
+same PDF field names as the TypeScript filler.
+
+A few fields are set by scat6-pdf-fill.ts outside SCAT6_FIELD_MAP (the
+Sex/Sex_V2 groups, the athelete1-7 Y/N history radios, Foot and the
+dual-task times); unmapped_field_values mirrors those assignments.
+
+Usage:
+    python3 scat6_field_map.py            # print the flattened mapping
+"""
+
+import json
+import re
+import sys
+
+mapping_path = 'app/scat-forms/shared/utils/scat6-field-mapping.ts'
+
+
+def _object_literal(source, name):
+    """Return the `{ ... }` text assigned to `export const <name>`"""
+    match = re.search(rf'export const {re.escape(name)}\s*=\s*{{', source)
+    if not match:
+        raise ValueError(f'{name} not found in mapping source')
+
+    start = match.end() - 1
+    depth = 0
+    quote = None
+    i = start
+    while i < len(source):
+        ch = source[i]
+        if quote:
+            if ch == '\\':
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in ('"', "'"):
+            quote = ch
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return source[start:i + 1]
+        i += 1
+    raise ValueError(f'Unterminated object literal for {name}')
+
+
+def parse_ts_object(literal):
+    """Convert a plain TypeScript object literal (keys, strings, arrays) to Python"""
+    lines = []
+    for line in literal.split('\n'):
+        # Drop // comments that are outside string literals
+        out = []
+        quote = None
+        i = 0
+        while i < len(line):
+            ch = line[i]
+            if quote:
+                if ch == quote:
+                    quote = None
+            elif ch in ('"', "'"):
+                quote = ch
+            elif line.startswith('//', i):
+                break
+            out.append(ch)
+            i += 1
+        lines.append(''.join(out))
+    text = '\n'.join(lines)
+
+    text = re.sub(r"'((?:[^'\\]|\\.)*)'", lambda m: json.dumps(m.group(1)), text)
+    text = re.sub(r'([{,]\s*)([A-Za-z_$][\w$]*)\s*:', r'\1"\2":', text)
+    text = re.sub(r',(\s*[}\]])', r'\1', text)
+    return json.loads(text)
+
+
+def load_field_map(path=mapping_path, name='SCAT6_FIELD_MAP'):
+    """Load a field map object literal from a TypeScript source file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_ts_object(_object_literal(f.read(), name))
+
+
+def flatten_field_map(field_map, prefix=''):
+    """Yield (dotted key, pdf field name) pairs; list entries get an index"""
+    for key, value in field_map.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from flatten_field_map(value, f'{path}.')
+        elif isinstance(value, list):
+            for i, name in enumerate(value):
+                yield f'{path}.{i}', name
+        else:
+            yield path, value
+
+
+def _is_blank(value):
+    return value is None or value == ''
+
+
+def _decision_columns(record, columns):
+    """
+    SCAT6FormData keeps the decision table as decisionDates.{name}{1,2,3};
+    regroup it into the {name: [col1, col2, col3]} shape of the field map.
+    """
+    dates = record.get('decisionDates') or {}
+    return {name: [dates.get(f'{name}{i}') for i in range(1, 4)] for name in columns}
+
+
+def record_to_field_values(record, field_map):
+    """
+    Map an assessment record (SCAT6FormData-shaped) to {pdf field: value}.
+
+    Values stay Python scalars; the PDF writer turns them into text or
+    appearance states based on the field type in the template:
+      - string map entries take the record value as-is
+      - nested objects (symptoms, decision) recurse into the record
+      - list entries take a per-item list from the record (memory trials,
+        delayed recall, decision columns), or a single letter choosing one
+        of the boxes (wordListUsed 'A' -> 'A', digitListUsed 'B' -> 'B_2')
+    """
+    values = {}
+    for key, target in field_map.items():
+        value = record.get(key) if isinstance(record, dict) else None
+        if key == 'decision' and value is None and isinstance(record, dict):
+            value = _decision_columns(record, target)
+        if isinstance(target, dict):
+            values.update(record_to_field_values(value or {}, target))
+        elif isinstance(target, list):
+            if isinstance(value, list):
+                for name, item in zip(target, value):
+                    if not _is_blank(item):
+                        values[name] = item
+            elif isinstance(value, str) and value:
+                for name in target:
+                    if name.split('_')[0] == value:
+                        values[name] = True
+        elif not _is_blank(value):
+            values[target] = value
+    return values
+
+
+# athelete1-5: Y/N radios beside the Check Box1-5 history answers
+HISTORY_RADIOS = (
+    ('athelete1', 'hospitalizedForHeadInjury'),
+    ('athelete2', 'headacheDisorder'),
+    ('athelete3', 'learningDisability'),
+    ('athelete4', 'adhd'),
+    ('athelete5', 'psychologicalDisorder'),
+)
+
+# athelete6-7 are only set once the question has been answered
+WORSE_WITH_RADIOS = (
+    ('athelete6', 'symptomsWorseWithPhysical'),
+    ('athelete7', 'symptomsWorseWithMental'),
+)
+
+FOOT_STATES = {'Left': '0', 'Right': '1'}
+
+# Dual-task text fields (optional section, page 7)
+DUAL_TASK_FIELDS = (
+    ('Text55', 'dualTask1Time'),
+    ('Text56', 'dualTask2Time'),
+    ('Text54', 'dualTask3Time'),
+    ('Text83A', 'dualTaskPracticeTime'),
+    ('Text81', 'dualTaskAlternateStartingInteger'),
+)
+
+
+def unmapped_field_values(record):
+    """
+    {pdf field: value} for the fields scat6-pdf-fill.ts sets outside
+    SCAT6_FIELD_MAP, with the same values: state '0' is Yes and '1' is No
+    on the athelete radios; dual-task times are copied as text.
+    """
+    values = {}
+    if record.get('sex'):
+        values['Sex'] = values['Sex_V2'] = record['sex']
+    for name, key in HISTORY_RADIOS:
+        values[name] = '0' if record.get(key) else '1'
+    for name, key in WORSE_WITH_RADIOS:
+        if record.get(key) is not None:
+            values[name] = '0' if record[key] else '1'
+    if record.get('footTested') in FOOT_STATES:
+        values['Foot'] = FOOT_STATES[record['footTested']]
+    for name, key in DUAL_TASK_FIELDS:
+        if not _is_blank(record.get(key)):
+            values[name] = record[key]
+    return values
+
+
+def main():
+    field_map = load_field_map()
+    for key, name in flatten_field_map(field_map):
+        print(f"{key:40} {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-stage timing and memory instrumentation for the Python tooling.
+
+Pipeline stages in convert_modules.py, the PDF field catalog/resolver and
+the form writer are wrapped with @profiled or `with stage(...)`. Profiling
+is off by default and costs a single flag check per call. Each script
+switches it on with enable() when run, from
+
+    --profile                 on the command line (scripts that take it), or
+    PORTAL_PROFILE=1          in the environment,
+
+which prints a JSON report to stderr when the script exits. Give a path
+instead (`--profile profile.json`, `PORTAL_PROFILE=profile.json`) to write
+the report to a file. Importing this module never turns profiling on. For
+each stage the report has the call count, total wall time and the
+tracemalloc peak (KiB above the memory in use when the stage started). Keys
+are sorted so two reports diff cleanly.
+
+tracemalloc slows allocation-heavy code, so compare profiled runs with
+profiled runs; use benchmark_tooling.py for unprofiled timings.
+
+Usage:
+    python3 stage_profiler.py report-a.json report-b.json   # compare two reports
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+PROFILE_ENV = 'PORTAL_PROFILE'
+
+
+class StageProfiler:
+    """Accumulates calls, wall time and tracemalloc peaks per named stage"""
+
+    def __init__(self):
+        self.enabled = False
+        self.output = None
+        self.stats = {}
+        self._stack = []
+        self._started = None
+
+    def enable(self, output=None):
+        """Start collecting; the report goes to `output` (a path) or stderr at exit"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.output = output
+        self._started = time.perf_counter()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        atexit.register(self.write_report)
+
+    def enter(self, name):
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            frame['peak'] = max(frame['peak'], peak)
+        tracemalloc.reset_peak()
+        self._stack.append({'name': name, 'base': current, 'peak': current, 'started': time.perf_counter()})
+
+    def exit(self):
+        elapsed_end = time.perf_counter()
+        _, peak = tracemalloc.get_traced_memory()
+        frame = self._stack.pop()
+        for parent in self._stack:
+            parent['peak'] = max(parent['peak'], peak)
+
+        stats = self.stats.setdefault(frame['name'], {'calls': 0, 'seconds': 0.0, 'peak_kib': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] += elapsed_end - frame['started']
+        stats['peak_kib'] = max(stats['peak_kib'], (max(frame['peak'], peak) - frame['base']) / 1024)
+
+    def report(self):
+        """The collected stages as a JSON-serialisable dict"""
+        return {
+            'script': os.path.basename(sys.argv[0]) if sys.argv else None,
+            'wall_seconds': round(time.perf_counter() - self._started, 6) if self._started else 0.0,
+            'stages': {
+                name: {
+                    'calls': stats['calls'],
+                    'seconds': round(stats['seconds'], 6),
+                    'peak_kib': round(stats['peak_kib'], 1),
+                }
+                for name, stats in sorted(self.stats.items())
+            },
+        }
+
+    def write_report(self):
+        data = json.dumps(self.report(), indent=2, sort_keys=True)
+        if self.output:
+            with open(self.output, 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+        else:
+            print(data, file=sys.stderr)
+
+
+profiler = StageProfiler()
+
+
+class stage:
+    """Context manager timing a block as a named stage when profiling is on"""
+
+    __slots__ = ('name', 'active')
+
+    def __init__(self, name):
+        self.name = name
+        self.active = False
+
+    def __enter__(self):
+        if profiler.enabled:
+            self.active = True
+            profiler.enter(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        if self.active:
+            profiler.exit()
+        return False
+
+
+def profiled(fn=None, name=None):
+    """Decorator form of stage(); the stage is named after the function by default"""
+    if fn is None:
+        return functools.partial(profiled, name=name)
+    label = name or fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return fn(*args, **kwargs)
+        profiler.enter(label)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.exit()
+    return wrapper
+
+
+def enable(option=None, environ=None):
+    """
+    Turn profiling on from a --profile option value (True, or a report path)
+    or, when the option was not given, from PORTAL_PROFILE.
+    """
+    if option:
+        profiler.enable(None if option is True else option)
+        return True
+    environ = os.environ if environ is None else environ
+    value = environ.get(PROFILE_ENV, '')
+    if value and value.lower() not in ('0', 'false', 'no', 'off'):
+        profiler.enable(None if value.lower() in ('1', 'true', 'yes', 'on') else value)
+        return True
+    return False
+
+
+def compare(before, after):
+    """Per-stage seconds and peak changes between two reports, as lines"""
+    lines = []
+    for name in sorted(set(before['stages']) | set(after['stages'])):
+        old = before['stages'].get(name)
+        new = after['stages'].get(name)
+        if old is None or new is None:
+            lines.append(f"  {name:32} {'added' if old is None else 'removed'}")
+            continue
+        seconds = (new['seconds'] - old['seconds']) / old['seconds'] if old['seconds'] else 0.0
+        lines.append(f"  {name:32} {old['seconds'] * 1000:9.1f} -> {new['seconds'] * 1000:9.1f} ms ({seconds:+.0%})"
+                     f"  peak {old['peak_kib']:9.1f} -> {new['peak_kib']:9.1f} KiB")
+    return lines
+
+
+def main(argv):
+    if len(argv) != 2:
+        print(__doc__.strip())
+        return 1
+    reports = []
+    for path in argv:
+        with open(path, 'r', encoding='utf-8') as f:
+            reports.append(json.load(f))
+    print(f"{argv[0]} -> {argv[1]}")
+    for line in compare(*reports):
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))